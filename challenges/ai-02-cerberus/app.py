@@ -4,10 +4,17 @@ Serves the intrusion detection model with hidden VAULT-ACCESS class
 """
 import pickle
 import numpy as np
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, g
 import logging
-from datetime import datetime
+import math
+import time
 import os
+from model_bundle import load_bundle
+from telemetry import ProbeTelemetry
+from ratelimit import TokenBucketLimiter
+from prediction_cache import PredictionCache
+from batcher import MicroBatcher
+from metrics import RequestMetrics
 
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -20,20 +27,80 @@ CHALLENGE_KEY = os.environ.get('CHALLENGE_KEY', 'offline-default-ai02')
 # Load the model and scaler
 MODEL_PATH = 'models/cerberus_model.pkl'
 SCALER_PATH = 'models/scaler.pkl'
+# Scaler + flat forest arrays written by train_cerberus.py; preferred when present
+BUNDLE_PATH = os.environ.get('CERBERUS_MODEL_BUNDLE', 'models/cerberus_bundle.npz')
 
-try:
-    with open(MODEL_PATH, 'rb') as f:
-        model = pickle.load(f)
-    with open(SCALER_PATH, 'rb') as f:
-        scaler = pickle.load(f)
-    logger.info("Cerberus model loaded successfully")
-except FileNotFoundError:
-    logger.error("Model files not found! Run train_cerberus.py first.")
-    model = None
-    scaler = None
+model = None
+scaler = None
+predictor = None
+MODEL_LOAD_SECONDS = 0.0
+MODEL_SOURCE = 'none'
+# Set by serve.py in pre-fork mode: shared worker readiness board for /health
+workers = None
 
-# Track probing attempts
-probe_log = []
+def load_model():
+    """
+    Load (or reload, on SIGHUP under serve.py) the model and scaler into the
+    module globals. The serving bundle is memory-mapped and needs neither
+    pickle nor scikit-learn; without it the pickled sklearn objects are used.
+    """
+    global model, scaler, predictor, MODEL_LOAD_SECONDS, MODEL_SOURCE
+    started = time.perf_counter()
+    if BUNDLE_PATH and os.path.exists(BUNDLE_PATH):
+        scaler, predictor = load_bundle(BUNDLE_PATH)
+        model = predictor
+        MODEL_SOURCE = 'bundle'
+        logger.info("Cerberus model loaded from bundle %s", BUNDLE_PATH)
+    else:
+        try:
+            with open(MODEL_PATH, 'rb') as f:
+                model = pickle.load(f)
+            with open(SCALER_PATH, 'rb') as f:
+                scaler = pickle.load(f)
+            MODEL_SOURCE = 'pickle'
+            logger.info("Cerberus model loaded successfully")
+        except FileNotFoundError:
+            logger.error("Model files not found! Run train_cerberus.py first.")
+            model = None
+            scaler = None
+            MODEL_SOURCE = 'none'
+        predictor = model
+    MODEL_LOAD_SECONDS = time.perf_counter() - started
+
+load_model()
+
+# Track probing attempts (fixed-size ring buffer + running aggregates)
+telemetry = ProbeTelemetry(capacity=int(os.environ.get('CERBERUS_PROBE_BUFFER', '10000')))
+
+# Upper bound on feature rows per /analyze request (batch form)
+MAX_BATCH = int(os.environ.get('CERBERUS_MAX_BATCH', '1024'))
+
+# Per-client rate limit on /analyze (requests per second, burst); rate 0 (default)
+# disables it, since teams behind one NAT address would share a single bucket.
+# Clients are keyed by IP unless CERBERUS_CLIENT_HEADER names a header set by a
+# trusted proxy (e.g. X-Team-Id); players must not be able to pick their own key.
+RATE_LIMIT = float(os.environ.get('CERBERUS_RATE_LIMIT', '0'))
+RATE_BURST = float(os.environ.get('CERBERUS_RATE_BURST', '40'))
+CLIENT_HEADER = os.environ.get('CERBERUS_CLIENT_HEADER', '')
+limiter = TokenBucketLimiter(RATE_LIMIT, RATE_BURST) if RATE_LIMIT > 0 else None
+
+# LRU cache of predictions for repeated probe rows; size 0 disables it.
+# CERBERUS_CACHE_DECIMALS rounds inputs (before scoring too) so near-duplicates share entries.
+CACHE_SIZE = int(os.environ.get('CERBERUS_CACHE_SIZE', '4096'))
+CACHE_DECIMALS = os.environ.get('CERBERUS_CACHE_DECIMALS', '')
+prediction_cache = PredictionCache(CACHE_SIZE, int(CACHE_DECIMALS) if CACHE_DECIMALS else None) if CACHE_SIZE > 0 else None
+
+# Micro-batching of concurrent small requests: up to CERBERUS_BATCH_ROWS rows or
+# CERBERUS_BATCH_WAIT_MS per model call; 0 rows (default) scores each request inline.
+BATCH_ROWS = int(os.environ.get('CERBERUS_BATCH_ROWS', '0'))
+BATCH_WAIT_MS = float(os.environ.get('CERBERUS_BATCH_WAIT_MS', '2'))
+
+def client_key():
+    if CLIENT_HEADER:
+        team = request.headers.get(CLIENT_HEADER)
+        if team:
+            return 'team:' + team
+    return request.remote_addr
 
 def check_vault_access(features):
     """
@@ -48,15 +115,121 @@ def check_vault_access(features):
         return True
     return False
 
+def vault_access_mask(X):
+    """
+    Row mask of the VAULT-ACCESS trigger for an (n, 20) feature matrix.
+    Same condition as check_vault_access, evaluated for all rows at once.
+    """
+    return (X[:, 7] > 0.8) & (X[:, 9] < -0.5) & (X[:, 13] > 0.9)
+
+def vault_response():
+    return {
+        "label": "VAULT-ACCESS",
+        "flag": FLAG_CERBERUS,
+        "key": CHALLENGE_KEY,
+        "confidence": 1.0,
+        "message": "The vault key has been revealed..."
+    }
+
+def score_rows(X):
+    """
+    Scale and score a feature matrix with one predict_proba call.
+    Labels are the argmax class, which is what model.predict returns, so the
+    forest is evaluated once instead of twice.
+    Returns (labels, confidences, probabilities).
+    """
+    started = time.perf_counter()
+    X_scaled = scaler.transform(X)
+    scaled = time.perf_counter()
+    probabilities = predictor.predict_proba(X_scaled)
+    best = probabilities.argmax(axis=1)
+    metrics.observe_stage('scale', scaled - started)
+    metrics.observe_stage('inference', time.perf_counter() - scaled)
+    return predictor.classes_[best], probabilities[np.arange(len(best)), best], probabilities
+
+def build_results(X):
+    """One prediction dict per row of X."""
+    labels, confidences, probabilities = score_rows(X)
+    classes = predictor.classes_.tolist()
+    return [
+        {
+            "label": label,
+            "confidence": confidence,
+            "probabilities": dict(zip(classes, probs))
+        }
+        for label, confidence, probs in zip(labels.tolist(), confidences.tolist(), probabilities.tolist())
+    ]
+
+batcher = MicroBatcher(build_results, BATCH_ROWS, BATCH_WAIT_MS) if BATCH_ROWS > 0 else None
+
+def infer(X):
+    """build_results, via the micro-batching queue for requests smaller than a batch."""
+    if batcher is not None and len(X) < batcher.max_rows:
+        return batcher.predict(X)
+    return build_results(X)
+
+def predict_rows(X):
+    """
+    Predictions for rows that did not trigger the vault, through the
+    prediction cache; all misses are scored together in one call.
+    """
+    if prediction_cache is None:
+        return infer(X)
+    Q = prediction_cache.quantize(X)
+    keys, results = prediction_cache.lookup(Q)
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        fresh = infer(Q[missing])
+        for i, result in zip(missing, fresh):
+            results[i] = result
+        prediction_cache.store([keys[i] for i in missing], fresh)
+    return results
+
+@app.before_request
+def start_request_metrics():
+    """Registered first so throttled and failed requests are timed too."""
+    g.metrics_started = time.perf_counter()
+    metrics.start_request()
+
+@app.after_request
+def end_request_metrics(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        metrics.end_request(request.endpoint, response.status_code, time.perf_counter() - started)
+    return response
+
+@app.before_request
+def rate_limit():
+    """Throttle /analyze and /analyse per client; 429 with Retry-After when a bucket is empty."""
+    if limiter is None or request.endpoint != 'analyze':
+        return None
+    allowed, retry_after = limiter.acquire(client_key())
+    if allowed:
+        return None
+    response = jsonify({"error": "Rate limit exceeded", "retry_after": round(retry_after, 3)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
 @app.route('/', methods=['GET'])
 def index():
     """Landing page for the challenge"""
-    return render_template('index.html')
+    return render_template('index.html', rate_limited=limiter is not None)
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "operational", "model": "Cerberus"})
+    status = {"status": "operational", "model": "Cerberus"}
+    if workers is not None:
+        status["workers"] = workers.status()
+        if not status["workers"]["ready"]:
+            status["status"] = "starting"
+            return jsonify(status), 503
+    if prediction_cache is not None:
+        status["prediction_cache"] = prediction_cache.stats()
+    if batcher is not None:
+        status["batching"] = batcher.stats()
+    return jsonify(status)
 
 @app.route('/analyze', methods=['GET', 'POST'])
 @app.route('/analyse', methods=['GET', 'POST'])  # Support British spelling
@@ -64,8 +237,10 @@ def analyze():
     """
     Main analysis endpoint.
     GET: Returns usage instructions
-    POST: Accepts JSON with 'features' array of 20 numerical values.
-    Returns prediction with hidden VAULT-ACCESS class if triggered.
+    POST: Accepts JSON with 'features' array of 20 numerical values, or a
+    batch of such arrays ({"features": [[...], [...]]}, up to MAX_BATCH rows).
+    Returns prediction with hidden VAULT-ACCESS class if triggered; a batch
+    gets {"results": [...], "count": n} with one prediction per row.
     """
     if request.method == 'GET':
         return jsonify({
@@ -74,7 +249,7 @@ def analyze():
             "endpoint": "/analyze",
             "description": "Analyze intrusion detection features",
             "required": {
-                "features": "Array of 20 numerical values"
+                "features": "Array of 20 numerical values (or an array of such arrays for a batch)"
             },
             "example": {
                 "features": [0.1, -0.2, 0.3, 0.4, -0.5, 0.6, -0.7, 0.8, -0.9, 1.0, -1.1, 1.2, -1.3, 1.4, -1.5, 1.6, -1.7, 1.8, -1.9, 2.0]
@@ -86,50 +261,46 @@ def analyze():
         return jsonify({"error": "Model not loaded"}), 500
     
     try:
+        started = time.perf_counter()
         data = request.get_json()
+        parsed = time.perf_counter()
+        metrics.observe_stage('parse', parsed - started)
         
         if 'features' not in data:
             return jsonify({"error": "Missing 'features' field"}), 400
         
-        features = np.array(data['features'], dtype=float)
+        X = np.array(data['features'], dtype=float)
+        batch = X.ndim == 2
+        if not batch:
+            X = X.reshape(1, -1)
         
-        if len(features) != 20:
+        if X.ndim != 2 or X.shape[1] != 20:
             return jsonify({"error": "Expected 20 features"}), 400
-        
-        # Log the request (for monitoring)
-        probe_log.append({
-            'timestamp': datetime.now().isoformat(),
-            'features': features.tolist()
-        })
+        if not 0 < len(X) <= MAX_BATCH:
+            return jsonify({"error": f"Expected 1 to {MAX_BATCH} feature rows"}), 400
+        metrics.observe_stage('validate', time.perf_counter() - parsed)
         
         # Check for hidden vault access trigger
-        if check_vault_access(features):
-            logger.warning("VAULT-ACCESS triggered!")
-            return jsonify({
-                "label": "VAULT-ACCESS",
-                "flag": FLAG_CERBERUS,
-                "key": CHALLENGE_KEY,
-                "confidence": 1.0,
-                "message": "The vault key has been revealed..."
-            })
+        vault = vault_access_mask(X)
         
-        # Normal prediction
-        features_scaled = scaler.transform([features])
-        prediction = model.predict(features_scaled)[0]
-        probabilities = model.predict_proba(features_scaled)[0]
+        # Log the request (for monitoring)
+        telemetry.record(X, client_key(), vault)
         
-        # Get confidence
-        class_idx = list(model.classes_).index(prediction)
-        confidence = float(probabilities[class_idx])
+        if vault.any():
+            ops = telemetry.operator_stats()
+            logger.warning("VAULT-ACCESS triggered! (%d triggers from %d clients so far, %d probes)",
+                           ops["vault_triggers"], ops["unique_clients"], ops["total_probes"])
         
-        return jsonify({
-            "label": prediction,
-            "confidence": confidence,
-            "probabilities": {
-                cls: float(prob) 
-                for cls, prob in zip(model.classes_, probabilities)
-            }
-        })
+        # Normal prediction for the remaining rows
+        results = [vault_response() if hit else None for hit in vault.tolist()]
+        rows = np.flatnonzero(~vault)
+        if len(rows):
+            for i, result in zip(rows.tolist(), predict_rows(X[rows])):
+                results[i] = result
+        
+        if not batch:
+            return jsonify(results[0])
+        return jsonify({"results": results, "count": len(results)})
     
     except Exception as e:
         logger.error(f"Error in analyze: {str(e)}")
@@ -204,18 +375,27 @@ def logs():
     Warning endpoint - shows recent probing attempts
     (This adds to the storyline)
     """
-    recent_logs = probe_log[-10:] if len(probe_log) > 10 else probe_log
     return jsonify({
         "warning": "Unauthorized probing detected last night.",
-        "recent_attempts": len(recent_logs),
+        "recent_attempts": min(telemetry.stored, 10),
+        "stats": telemetry.stats(client=client_key()),
         "message": "Cerberus is monitoring all access attempts."
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request counts, latency histograms and model load time in Prometheus text format"""
+    body = metrics.render(MODEL_LOAD_SECONDS, MODEL_SOURCE)
+    return app.response_class(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/favicon.ico', methods=['GET'])
 def favicon():
     """Handle favicon requests to prevent 404 errors"""
     return '', 204  # No Content
 
+# One counter row per route, so created once all routes are registered
+metrics = RequestMetrics(app.view_functions)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=False)
 
@@ -0,0 +1,122 @@
+"""
+Micro-batching queue for Cerberus inference.
+
+Request threads submit their (few) feature rows and block on a Future; one
+background thread takes the first waiting submission, keeps collecting for up
+to `max_wait_ms` or until `max_rows` rows are queued, scores them all with a
+single call of `score_fn` and hands each request back its own slice. Under
+concurrency this replaces N small scaler/forest calls with one vectorized
+call; with a single client it only adds up to max_wait_ms of latency. If the
+combined call fails, each submission is scored on its own so only the bad
+one gets the error.
+
+The thread is started lazily by the first submit in each process, so a
+batcher created before serve.py forks its workers still works in them.
+Batch sizes (in rows) are counted in power-of-two buckets for /health.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_rows=64, max_wait_ms=2.0):
+        if max_rows < 1 or max_wait_ms < 0:
+            raise ValueError("max_rows must be >= 1 and max_wait_ms >= 0")
+        self.score_fn = score_fn
+        self.max_rows = int(max_rows)
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._queue = None
+        # Operator counters, written only by the batching thread
+        self.batches = 0
+        self.rows = 0
+        self.histogram = [0] * self.max_rows.bit_length()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Fresh queue per process: anything inherited across fork is stale
+            self._queue = queue.SimpleQueue()
+            self.batches = 0
+            self.rows = 0
+            self.histogram = [0] * len(self.histogram)
+            threading.Thread(target=self._run, name="cerberus-batcher", daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, X):
+        """Queue the rows of X (n, n_features); the Future resolves to score_fn's list for them."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def predict(self, X):
+        return self.submit(X).result()
+
+    def _collect(self):
+        first = self._queue.get()
+        pending = [first]
+        n_rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait_s
+        while n_rows < self.max_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.append(item)
+            n_rows += len(item[0])
+        return pending, n_rows
+
+    def _run(self):
+        while True:
+            pending, n_rows = self._collect()
+            try:
+                X = pending[0][0] if len(pending) == 1 else np.concatenate([x for x, _f in pending])
+                results = self.score_fn(X)
+            except Exception as e:
+                if len(pending) == 1:
+                    pending[0][1].set_exception(e)
+                else:
+                    self._score_each(pending)
+            else:
+                start = 0
+                for x, future in pending:
+                    future.set_result(results[start:start + len(x)])
+                    start += len(x)
+            self.batches += 1
+            self.rows += n_rows
+            self.histogram[min(n_rows.bit_length(), len(self.histogram)) - 1] += 1
+
+    def _score_each(self, pending):
+        # One bad submission (e.g. an infinite feature) must not fail the
+        # requests it happened to share a batch with: retry them one by one.
+        for x, future in pending:
+            try:
+                future.set_result(self.score_fn(x))
+            except Exception as e:
+                future.set_exception(e)
+
+    def stats(self):
+        last = len(self.histogram) - 1
+        buckets = {}
+        for i, count in enumerate(self.histogram):
+            lo = 1 << i
+            buckets[f"{lo}+" if i == last else str(lo) if i == 0 else f"{lo}-{2 * lo - 1}"] = count
+        return {
+            "max_rows": self.max_rows,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_rows": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "batch_rows_histogram": buckets,
+        }
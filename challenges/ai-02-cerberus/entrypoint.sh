@@ -19,6 +19,6 @@ echo "[AI-02-CERBERUS] Starting challenge setup..."
 echo "[*] Challenge Key: ${CHALLENGE_KEY}"
 echo "[*] Flag (Cerberus Extracted): ${FLAG_CERBERUS}"
 
-# Execute the main application
-exec python app.py
+# Execute the main application (pre-fork worker pool; CERBERUS_WORKERS sets the size)
+exec python serve.py
 
@@ -0,0 +1,126 @@
+"""
+Flat-array random forest for Cerberus serving.
+
+train_cerberus.py exports the fitted RandomForestClassifier into one set of
+NumPy arrays covering all trees (node i of every tree lives at a global index):
+
+    roots      int32   (n_trees,)             root node of each tree
+    feature    int32   (n_nodes,)             split feature (0 on leaves)
+    threshold  float64 (n_nodes,)             go left when x[feature] <= threshold
+    left/right int32   (n_nodes,)             children; a leaf points to itself
+    value      float64 (n_nodes, n_classes)   normalized class distribution
+    classes    str     (n_classes,)
+
+Inference walks every tree for every row at once, one level per step (a fixed
+max_depth number of gathers), then averages the leaf distributions: the same
+result as predict_proba without sklearn's validation and per-tree dispatch.
+Only numpy is needed to load and run it.
+"""
+import numpy as np
+
+
+class FlatForest:
+    BLOCK_ROWS = 1024
+
+    def __init__(self, roots, feature, threshold, left, right, value, classes, max_depth, n_features):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        # Traversal tables: children[2 * node + go_right] is the next node.
+        self._children = np.stack([left, right], axis=1).ravel().astype(np.intp)
+        self._feature = feature.astype(np.intp)
+        self._roots = roots.astype(np.intp)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted RandomForestClassifier (single output)."""
+        roots, feature, threshold, left, right, value = [], [], [], [], [], []
+        base = 0
+        max_depth = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            leaf = tree.children_left == -1
+            ids = np.arange(tree.node_count)
+            roots.append(base)
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(np.where(leaf, 0.0, tree.threshold))
+            left.append(np.where(leaf, ids, tree.children_left) + base)
+            right.append(np.where(leaf, ids, tree.children_right) + base)
+            # scikit-learn < 1.4 stores weighted class counts and normalizes them in
+            # predict_proba; newer versions store the fractions directly.
+            counts = tree.value[:, 0, :].astype(np.float64)
+            totals = counts.sum(axis=1, keepdims=True)
+            if np.any(np.abs(totals - 1.0) > 1e-12):
+                totals[totals == 0.0] = 1.0
+                counts = counts / totals
+            value.append(counts)
+            max_depth = max(max_depth, tree.max_depth)
+            base += tree.node_count
+        return cls(
+            np.asarray(roots, dtype=np.int32),
+            np.concatenate(feature).astype(np.int32),
+            np.concatenate(threshold).astype(np.float64),
+            np.concatenate(left).astype(np.int32),
+            np.concatenate(right).astype(np.int32),
+            np.concatenate(value),
+            np.asarray(model.classes_).astype(str),
+            max_depth,
+            model.n_features_in_,
+        )
+
+    def arrays(self):
+        return {
+            "roots": self.roots,
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "classes": self.classes_,
+            "max_depth": np.int32(self.max_depth),
+            "n_features": np.int32(self.n_features),
+        }
+
+    def save(self, path):
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(**{name: z[name] for name in z.files})
+
+    def apply(self, X):
+        """Leaf index of every (tree, row): shape (n_trees, n_rows)."""
+        n = len(X)
+        # sklearn trees compare float32 inputs against float64 thresholds.
+        Xf = np.ascontiguousarray(X, dtype=np.float32).ravel()
+        offsets = np.tile(np.arange(0, n * self.n_features, self.n_features, dtype=np.intp), len(self._roots))
+        node = np.repeat(self._roots, n)
+        for _ in range(self.max_depth):
+            go_right = Xf[offsets + self._feature[node]] > self.threshold[node]
+            node = self._children[2 * node + go_right]
+        return node.reshape(len(self._roots), n)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected shape (n, {self.n_features})")
+        if not np.isfinite(X.astype(np.float32)).all():
+            # Same rule as the pinned scikit-learn forest (float32 inputs, no missing values)
+            raise ValueError("Input X contains NaN, infinity or a value too large for dtype('float32').")
+        # Row blocks keep the (trees x rows) work arrays cache-sized.
+        proba = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), self.BLOCK_ROWS):
+            block = X[start:start + self.BLOCK_ROWS]
+            proba[start:start + len(block)] = self.value[self.apply(block)].sum(axis=0)
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
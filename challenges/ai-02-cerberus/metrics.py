@@ -0,0 +1,177 @@
+"""
+Request and latency metrics for Cerberus, rendered in Prometheus text format.
+
+Every thread records into its own flat list of floats (one slot per counter,
+histogram bucket and sum), so an update is a couple of list increments with
+no lock. A scrape sums the lists of all threads; lists of threads that have
+exited are folded into a retired total (also when many threads have come and
+gone, since the threaded servers use one thread per request).
+
+Under serve.py the totals of each worker are copied into its row of a shared
+memory table (flush(), about once a second and before each scrape), and
+/metrics renders the sum of all rows whichever worker answers. A respawned
+worker starts from its slot's last totals, so counters stay monotonic.
+"""
+import bisect
+import mmap
+import threading
+
+import numpy as np
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STAGES = ("parse", "validate", "scale", "inference")
+STATUS_CODES = (200, 204, 400, 404, 405, 429, 500, 503)
+UNMATCHED_ROUTE = "(unmatched)"
+# Past this many per-thread lists, registering a new one folds the dead ones
+MAX_SHARDS = 64
+
+
+class RequestMetrics:
+    def __init__(self, routes):
+        self.routes = tuple(sorted(routes)) + (UNMATCHED_ROUTE,)
+        self.route_index = {route: i for i, route in enumerate(self.routes)}
+        self.code_index = {code: i for i, code in enumerate(STATUS_CODES)}
+        n_codes = len(STATUS_CODES) + 1  # last column: any other status
+        hist = len(LATENCY_BUCKETS) + 2  # bucket counts, +Inf count, sum
+        # Layout of a shard: requests[route, code], request histograms per
+        # route, stage histograms, in-flight gauge.
+        self.requests_at = 0
+        self.n_codes = n_codes
+        self.route_hist_at = len(self.routes) * n_codes
+        self.stage_hist_at = self.route_hist_at + len(self.routes) * hist
+        self.inflight_at = self.stage_hist_at + len(STAGES) * hist
+        self.hist = hist
+        self.size = self.inflight_at + 1
+        self.stage_index = {stage: i for i, stage in enumerate(STAGES)}
+        self._local = threading.local()
+        self._shards = []  # (thread, shard)
+        self._retired = np.zeros(self.size)
+        self._lock = threading.Lock()
+        # Shared table (serve.py): one row per worker slot
+        self._table = None
+        self._slot = None
+        self._base = None
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = [0.0] * self.size
+            with self._lock:
+                if len(self._shards) >= MAX_SHARDS:
+                    self._fold_dead()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _fold_dead(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._retired += shard
+        self._shards = live
+
+    def _observe(self, shard, at, seconds):
+        shard[at + bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        shard[at + self.hist - 1] += seconds
+
+    def start_request(self):
+        self._shard()[self.inflight_at] += 1
+
+    def end_request(self, route, status, seconds):
+        shard = self._shard()
+        shard[self.inflight_at] -= 1
+        r = self.route_index.get(route, len(self.routes) - 1)
+        shard[self.requests_at + r * self.n_codes + self.code_index.get(status, self.n_codes - 1)] += 1
+        self._observe(shard, self.route_hist_at + r * self.hist, seconds)
+
+    def observe_stage(self, stage, seconds):
+        self._observe(self._shard(), self.stage_hist_at + self.stage_index[stage] * self.hist, seconds)
+
+    def totals(self):
+        """This process's totals over all threads."""
+        with self._lock:
+            self._fold_dead()
+            total = self._retired.copy()
+            for _thread, shard in self._shards:
+                total += shard
+        return total
+
+    # Pre-fork aggregation
+
+    def share(self, slots):
+        """Allocate the shared per-worker table; call in the parent before forking."""
+        buf = mmap.mmap(-1, slots * self.size * 8)
+        self._table = np.frombuffer(buf, dtype=np.float64).reshape(slots, self.size)
+
+    def attach(self, slot):
+        """In a new worker: report into row `slot`, continuing from its last totals."""
+        # Start clean: nothing recorded by the parent belongs to this worker
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = np.zeros(self.size)
+        self._slot = slot
+        self._base = self._table[slot].copy()
+        self._base[self.inflight_at] = 0.0  # a dead worker's requests are gone
+        self.flush()
+
+    def retire(self, slot):
+        """In the parent, once the worker in `slot` has exited: it has nothing in flight."""
+        self._table[slot, self.inflight_at] = 0.0
+
+    def flush(self):
+        if self._slot is not None:
+            self._table[self._slot] = self._base + self.totals()
+
+    def aggregate(self):
+        if self._table is None:
+            return self.totals()
+        self.flush()
+        return self._table.sum(axis=0)
+
+    # Exposition
+
+    def _histogram(self, lines, name, labels, values):
+        cumulative = np.cumsum(values[:-1])
+        for le, count in zip(LATENCY_BUCKETS + ("+Inf",), cumulative):
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count:.0f}')
+        lines.append(f"{name}_sum{{{labels}}} {values[-1]:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative[-1]:.0f}")
+
+    def render(self, model_load_seconds, model_source):
+        total = self.aggregate()
+        lines = [
+            "# HELP cerberus_requests_total HTTP requests by route (Flask endpoint) and status code.",
+            "# TYPE cerberus_requests_total counter",
+        ]
+        codes = [str(code) for code in STATUS_CODES] + ["other"]
+        for r, route in enumerate(self.routes):
+            for c, code in enumerate(codes):
+                count = total[self.requests_at + r * self.n_codes + c]
+                if count:
+                    lines.append(f'cerberus_requests_total{{route="{route}",code="{code}"}} {count:.0f}')
+        lines += [
+            "# HELP cerberus_request_duration_seconds Time from first hook to response, by route.",
+            "# TYPE cerberus_request_duration_seconds histogram",
+        ]
+        for r, route in enumerate(self.routes):
+            at = self.route_hist_at + r * self.hist
+            if total[at:at + self.hist - 1].any():
+                self._histogram(lines, "cerberus_request_duration_seconds", f'route="{route}"', total[at:at + self.hist])
+        lines += [
+            "# HELP cerberus_stage_duration_seconds /analyze stages: JSON parse, validation, scaling, model inference (per model call).",
+            "# TYPE cerberus_stage_duration_seconds histogram",
+        ]
+        for s, stage in enumerate(STAGES):
+            at = self.stage_hist_at + s * self.hist
+            self._histogram(lines, "cerberus_stage_duration_seconds", f'stage="{stage}"', total[at:at + self.hist])
+        lines += [
+            "# HELP cerberus_in_flight_requests Requests being handled.",
+            "# TYPE cerberus_in_flight_requests gauge",
+            f"cerberus_in_flight_requests {total[self.inflight_at]:.0f}",
+            "# HELP cerberus_model_load_seconds Duration of the last model load.",
+            "# TYPE cerberus_model_load_seconds gauge",
+            f'cerberus_model_load_seconds{{source="{model_source}"}} {model_load_seconds:.6f}',
+        ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,83 @@
+"""
+Compact serving bundle for Cerberus: scaler + flat forest in one file.
+
+train_cerberus.py writes models/cerberus_bundle.npz, an uncompressed .npz
+holding the StandardScaler's mean_/scale_ (as scaler_mean, scaler_scale) and
+the FlatForest arrays (see flat_forest.py), class labels included. Every
+member is a plain .npy stored without compression, so load_bundle() maps the
+file once and builds each array directly on the mapping: nothing is unpickled,
+scikit-learn is never imported, and pages are only read (and shared between
+forked workers) as inference touches them.
+"""
+import mmap
+import os
+import zipfile
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from flat_forest import FlatForest
+
+# Local file header: fixed 30 bytes, then file name and extra field
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_NAME_LENGTHS_AT = 26
+
+
+class BundleScaler:
+    """StandardScaler.transform from the fitted mean_ and scale_ arrays."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(mean)
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if np.isinf(X).any():
+            # Same rule as StandardScaler (NaN passes through, infinity does not)
+            raise ValueError("Input X contains infinity or a value too large for dtype('float64').")
+        return (X - self.mean_) / self.scale_
+
+
+def save_bundle(path, scaler, forest):
+    # Write aside and rename: a running server may have the old file mapped,
+    # and truncating it in place would crash it on the next page fault.
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        np.savez(f, scaler_mean=scaler.mean_, scaler_scale=scaler.scale_, **forest.arrays())
+    os.replace(tmp, path)
+
+
+def map_npz(path):
+    """{name: read-only array backed by an mmap of path} for an uncompressed .npz."""
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        arrays = {}
+        with zipfile.ZipFile(f) as zf:
+            for info in zf.infolist():
+                if info.compress_type != zipfile.ZIP_STORED or not info.filename.endswith(".npy"):
+                    raise ValueError(f"{path}: {info.filename} is not a stored .npy member")
+                name_len, extra_len = np.frombuffer(
+                    buf, dtype="<u2", count=2, offset=info.header_offset + _LOCAL_NAME_LENGTHS_AT
+                )
+                f.seek(info.header_offset + _LOCAL_HEADER_SIZE + int(name_len) + int(extra_len))
+                version = npy_format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = npy_format.read_array_header_1_0(f)
+                elif version == (2, 0):
+                    shape, fortran_order, dtype = npy_format.read_array_header_2_0(f)
+                else:
+                    raise ValueError(f"{path}: {info.filename} has unsupported .npy version {version}")
+                if dtype.hasobject:
+                    raise ValueError(f"{path}: {info.filename} holds Python objects")
+                arrays[info.filename[:-4]] = np.ndarray(
+                    shape, dtype=dtype, buffer=buf, offset=f.tell(), order="F" if fortran_order else "C"
+                )
+    return arrays
+
+
+def load_bundle(path):
+    """(scaler, forest) from a bundle written by save_bundle."""
+    arrays = map_npz(path)
+    scaler = BundleScaler(arrays.pop("scaler_mean"), arrays.pop("scaler_scale"))
+    return scaler, FlatForest(**arrays)
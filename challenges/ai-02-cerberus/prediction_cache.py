@@ -0,0 +1,69 @@
+"""
+LRU cache of Cerberus predictions for repeated probe vectors.
+
+Rows are optionally rounded to `decimals` places and keyed by a 16-byte BLAKE2b
+digest of their float64 bytes. When rounding is on, the model scores the
+rounded row on a miss as well, so a hit returns exactly what an uncached call
+at that precision returns. With decimals=None the key is the exact input and
+responses never change. The VAULT-ACCESS trigger is evaluated by the caller
+on the exact input, before the cache is consulted.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    def __init__(self, maxsize=4096, decimals=None):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def quantize(self, X):
+        if self.decimals is None:
+            return np.ascontiguousarray(X, dtype=np.float64)
+        # + 0.0 folds -0.0 into 0.0 so both hash alike
+        return np.round(np.asarray(X, dtype=np.float64), self.decimals) + 0.0
+
+    @staticmethod
+    def key(row):
+        return hashlib.blake2b(row.tobytes(), digest_size=16).digest()
+
+    def lookup(self, Q):
+        """(keys, cached results or None) for the quantized rows of Q."""
+        keys = [self.key(row) for row in Q]
+        with self._lock:
+            found = []
+            for k in keys:
+                hit = self._entries.get(k)
+                if hit is not None:
+                    self._entries.move_to_end(k)
+                found.append(hit)
+            n_hits = sum(hit is not None for hit in found)
+            self.hits += n_hits
+            self.misses += len(keys) - n_hits
+        return keys, found
+
+    def store(self, keys, results):
+        with self._lock:
+            for k, result in zip(keys, results):
+                self._entries[k] = result
+                self._entries.move_to_end(k)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "decimals": self.decimals,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,181 @@
+"""
+Per-client token-bucket rate limiting for Cerberus.
+
+Each client key (IP address, or a team header set by a trusted proxy) owns a
+bucket of up to `burst` tokens refilled at `rate` tokens per second; a request
+takes one token or is rejected with the time until one is available. Buckets
+are two floats in a dict, guarded by one of a fixed set of striped locks, so a
+check is O(1) and threads only contend when their keys share a stripe.
+
+Buckets untouched for `idle_s` seconds are full again and carry no state, so a
+periodic sweep (at most one thread at a time, every idle_s / 2) drops them and
+memory stays bounded by the clients active in the last idle window.
+
+SharedTokenBucketLimiter keeps the same buckets in a file mapping shared by
+forked workers (serve.py), so a client's rate does not depend on how many
+workers its connections are spread over.
+"""
+import fcntl
+import hashlib
+import mmap
+import struct
+import tempfile
+import threading
+import time
+
+
+class TokenBucketLimiter:
+    STRIPES = 64
+
+    def __init__(self, rate, burst, idle_s=300.0, clock=time.monotonic):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be > 0 and burst >= 1")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        # An idle bucket must have refilled completely before it is dropped.
+        self.idle_s = max(float(idle_s), self.burst / self.rate)
+        self.clock = clock
+        self.buckets = {}  # key -> [tokens, last refill time]
+        self._locks = [threading.Lock() for _ in range(self.STRIPES)]
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = clock() + self.idle_s / 2
+        # Operator counters (approximate under concurrency: not under one lock)
+        self.allowed = 0
+        self.throttled = 0
+        self.evicted = 0
+
+    def _lock(self, key):
+        return self._locks[hash(key) % self.STRIPES]
+
+    def acquire(self, key, cost=1.0):
+        """Take cost tokens from key's bucket. Returns (allowed, retry_after_seconds)."""
+        now = self.clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        with self._lock(key):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                self.allowed += 1
+                return True, 0.0
+            bucket[0] = tokens
+        self.throttled += 1
+        return False, (cost - tokens) / self.rate
+
+    def _sweep(self, now):
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + self.idle_s / 2
+            for key, bucket in list(self.buckets.items()):
+                if now - bucket[1] >= self.idle_s:
+                    with self._lock(key):
+                        if now - bucket[1] >= self.idle_s and self.buckets.get(key) is bucket:
+                            del self.buckets[key]
+                            self.evicted += 1
+        finally:
+            self._sweep_lock.release()
+
+    def stats(self):
+        return {
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "clients": len(self.buckets),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "evicted": self.evicted,
+        }
+
+
+class SharedTokenBucketLimiter:
+    """
+    TokenBucketLimiter whose buckets are shared by processes forked after it
+    is created. The table is set-associative: a key hashes to a set of WAYS
+    entries (key hash, tokens, last refill time). A new key takes an empty or
+    idle entry (idle ones are full again anyway), otherwise the least recently
+    used one, whose client starts over with a full bucket. A set is guarded by
+    a thread lock and an fcntl lock on one byte of the backing file, which the
+    kernel releases if a worker dies holding it. Counters are per process.
+    """
+
+    WAYS = 8
+    STRIPES = 64
+    ENTRY = struct.Struct("Qdd")
+
+    def __init__(self, rate, burst, sets=1024, idle_s=300.0, clock=time.monotonic):
+        if rate <= 0 or burst < 1 or sets < 1:
+            raise ValueError("rate must be > 0, burst >= 1 and sets >= 1")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.idle_s = max(float(idle_s), self.burst / self.rate)
+        self.clock = clock
+        self.sets = sets
+        size = sets * self.WAYS * self.ENTRY.size
+        self._file = tempfile.TemporaryFile()
+        self._file.truncate(size)
+        self.buf = mmap.mmap(self._file.fileno(), size)
+        self._locks = [threading.Lock() for _ in range(self.STRIPES)]
+        self.allowed = 0
+        self.throttled = 0
+        self.evicted = 0
+
+    def acquire(self, key, cost=1.0):
+        """Take cost tokens from key's bucket. Returns (allowed, retry_after_seconds)."""
+        # Hash 0 marks an empty entry
+        h = int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), "little") | 1
+        s = h % self.sets
+        stripe = s % self.STRIPES
+        fd = self._file.fileno()
+        with self._locks[stripe]:
+            fcntl.lockf(fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                tokens = self._take(s * self.WAYS * self.ENTRY.size, h, self.clock(), cost)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN, 1, stripe)
+        if tokens is None:
+            self.allowed += 1
+            return True, 0.0
+        self.throttled += 1
+        return False, (cost - tokens) / self.rate
+
+    def _take(self, base, h, now, cost):
+        """Update key h's entry in the set at base; None if allowed, else the tokens left."""
+        entry = self.ENTRY
+        victim, victim_last = None, None
+        for off in range(base, base + self.WAYS * entry.size, entry.size):
+            key, tokens, last = entry.unpack_from(self.buf, off)
+            if key == h:
+                break
+            if key == 0 or now - last >= self.idle_s:
+                last = float("-inf")
+            if victim is None or last < victim_last:
+                victim, victim_last = off, last
+        else:
+            off = victim
+            if victim_last != float("-inf"):
+                self.evicted += 1
+            tokens, last = self.burst, now
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens >= cost:
+            entry.pack_into(self.buf, off, h, tokens - cost, now)
+            return None
+        entry.pack_into(self.buf, off, h, tokens, now)
+        return tokens
+
+    def stats(self):
+        now = self.clock()
+        clients = sum(
+            1 for key, _tokens, last in self.ENTRY.iter_unpack(self.buf) if key and now - last < self.idle_s
+        )
+        return {
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "clients": clients,
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,328 @@
+"""
+Cerberus production server: pre-forked worker pool.
+
+The parent imports app.py (model, scaler and flat forest are loaded once),
+binds the listening socket and forks N workers that all accept on it; the big
+model arrays are shared copy-on-write. Each worker serves one connection per
+thread (so an idle or slow client ties up a thread, never the worker) with a
+read timeout, and marks itself ready on a shared-memory board after a warm-up
+prediction; /health reports the board and answers 503 until the pool is
+complete.
+
+Signals (to the parent):
+  SIGHUP           reload the model from models/, fork a new generation of
+                   workers, then retire the old ones once the new ones are ready
+                   (in-flight requests finish; the socket never closes). If the
+                   model fails to load or the new workers never get ready, the
+                   old model and generation keep serving.
+  SIGTERM/SIGINT   graceful shutdown
+
+With micro-batching on (CERBERUS_BATCH_ROWS > 0) concurrent requests in a
+worker share a model call; otherwise each thread scores its own request.
+
+Request metrics are summed across workers through a shared table, so /metrics
+gives the same totals whichever worker serves the scrape.
+
+Rate-limit buckets live in a table shared by all workers, so a client gets the
+configured rate however the kernel spreads its connections over them. Other
+per-process state (probe telemetry, prediction cache, batching queue) is kept
+per worker.
+
+Usage:
+  python serve.py [--workers N] [--host 0.0.0.0] [--port 5000]
+"""
+import argparse
+import logging
+import mmap
+import os
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+import app as cerberus
+from ratelimit import SharedTokenBucketLimiter
+
+logger = logging.getLogger("cerberus.serve")
+
+# How long to wait for a new generation before giving up on a reload
+READY_TIMEOUT_S = 60.0
+# app.py globals replaced by load_model(), restored when a reload fails
+MODEL_GLOBALS = ("model", "scaler", "predictor", "MODEL_LOAD_SECONDS", "MODEL_SOURCE")
+# Poll interval of the parent loop and of the workers' accept loop
+TICK_S = 0.2
+# How long a stopping threaded worker waits for its in-flight requests
+DRAIN_TIMEOUT_S = 10.0
+# How often a worker copies its metrics into the shared table for /metrics
+METRICS_FLUSH_S = 1.0
+# Socket timeout per connection: a client that sends nothing is dropped after this
+REQUEST_TIMEOUT_S = float(os.environ.get("CERBERUS_REQUEST_TIMEOUT_S", "10"))
+
+
+class OneShotRequestHandler(WSGIRequestHandler):
+    # Werkzeug switches threaded servers to keep-alive; one request per
+    # connection lets shutdown drain.
+    protocol_version = "HTTP/1.0"
+    timeout = REQUEST_TIMEOUT_S
+
+
+class ThreadedWorkerServer(ThreadedWSGIServer):
+    """Thread per request, counting the active ones so shutdown can drain them."""
+
+    block_on_close = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active = 0
+        self.idle = threading.Condition()
+
+    def process_request_thread(self, request, client_address):
+        with self.idle:
+            self.active += 1
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self.idle:
+                self.active -= 1
+                self.idle.notify_all()
+
+    def drain(self, timeout):
+        with self.idle:
+            return self.idle.wait_for(lambda: self.active == 0, timeout)
+
+
+class WorkerBoard:
+    """
+    Anonymous shared memory created before forking: a header (expected worker
+    count, generation) and one slot per worker, holding its pid once ready.
+    """
+
+    HEADER = struct.Struct("qq")
+    SLOT = struct.Struct("q")
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.buf = mmap.mmap(-1, self.HEADER.size + self.SLOT.size * slots)
+
+    def set_header(self, expected, generation):
+        self.HEADER.pack_into(self.buf, 0, expected, generation)
+
+    def mark(self, slot, pid):
+        self.SLOT.pack_into(self.buf, self.HEADER.size + self.SLOT.size * slot, pid)
+
+    def pid(self, slot):
+        return self.SLOT.unpack_from(self.buf, self.HEADER.size + self.SLOT.size * slot)[0]
+
+    def status(self):
+        expected, generation = self.HEADER.unpack_from(self.buf, 0)
+        ready = sum(1 for i in range(self.slots) if self.pid(i))
+        return {"ready": ready >= expected, "ready_workers": ready, "expected": expected, "generation": generation}
+
+
+def worker_main(sock, slot, board):
+    """Serve on the inherited socket until SIGTERM; never returns."""
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    cerberus.metrics.attach(slot)
+    host, port = sock.getsockname()[:2]
+    server = ThreadedWorkerServer(host, port, cerberus.app, handler=OneShotRequestHandler, fd=sock.fileno())
+    server.timeout = TICK_S
+    code = 0
+    try:
+        # Warm-up: first call pays for lazy imports and page faults
+        if cerberus.predictor is not None:
+            cerberus.score_rows(np.zeros((1, 20)))
+        board.mark(slot, os.getpid())
+        flushed = time.monotonic()
+        while not stopping:
+            server.handle_request()
+            if time.monotonic() - flushed >= METRICS_FLUSH_S:
+                cerberus.metrics.flush()
+                flushed = time.monotonic()
+        server.drain(DRAIN_TIMEOUT_S)
+        cerberus.metrics.flush()
+    except Exception:
+        logger.exception("worker %d crashed", os.getpid())
+        code = 1
+    finally:
+        board.mark(slot, 0)
+    os._exit(code)
+
+
+class PreforkServer:
+    def __init__(self, host, port, workers):
+        self.workers = workers
+        # Two generations can be alive during a reload
+        self.board = WorkerBoard(2 * workers)
+        self.generation = 0  # the generation serving traffic
+        self.last_generation = 0
+        self.pids = {}  # pid -> (slot, generation)
+        self.stopping = False
+        self.reload_requested = False
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(1024)
+        cerberus.workers = self.board
+        cerberus.metrics.share(self.board.slots)
+        if cerberus.limiter is not None:
+            cerberus.limiter = SharedTokenBucketLimiter(cerberus.RATE_LIMIT, cerberus.RATE_BURST)
+
+    def _free_slot(self):
+        used = {slot for slot, _gen in self.pids.values()}
+        return next(i for i in range(self.board.slots) if i not in used)
+
+    def spawn(self, generation=None):
+        slot = self._free_slot()
+        self.board.mark(slot, 0)
+        pid = os.fork()
+        if pid == 0:
+            worker_main(self.sock, slot, self.board)
+        self.pids[pid] = (slot, self.generation if generation is None else generation)
+        return pid
+
+    def generation_pids(self, generation):
+        return [pid for pid, (_slot, gen) in self.pids.items() if gen == generation]
+
+    def generation_ready(self, generation):
+        ready = sum(1 for slot, gen in self.pids.values() if gen == generation and self.board.pid(slot))
+        return ready >= self.workers
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot, gen = self.pids.pop(pid, (None, None))
+            if slot is None:
+                continue
+            self.board.mark(slot, 0)
+            cerberus.metrics.retire(slot)
+            if not self.stopping and gen == self.generation:
+                logger.warning("worker %d exited (status %d); respawning", pid, status)
+                self.spawn()
+
+    def reload(self):
+        """
+        Reload the model in the parent and start a new generation on it. The
+        old generation keeps serving until the new one is fully ready; if the
+        model fails to load or the new workers do not come up, the reload is
+        abandoned and the old model and workers stay in place.
+        """
+        logger.info("SIGHUP: reloading model")
+        # Slots of workers retired by an earlier reload must be free again
+        self._wait_exited([pid for pid, (_slot, gen) in self.pids.items() if gen != self.generation])
+        saved = {name: getattr(cerberus, name) for name in MODEL_GLOBALS}
+        try:
+            cerberus.load_model()
+            if cerberus.model is None:
+                raise RuntimeError("no model files found")
+        except Exception:
+            logger.exception("reload failed: model did not load; keeping generation %d", self.generation)
+            self._restore(saved)
+            return
+        self.last_generation += 1
+        new = self.last_generation
+        for _ in range(self.workers):
+            self.spawn(new)
+        deadline = time.monotonic() + READY_TIMEOUT_S
+        while not self.generation_ready(new) and not self.stopping:
+            self.reap()
+            if len(self.generation_pids(new)) < self.workers or time.monotonic() >= deadline:
+                break
+            time.sleep(TICK_S / 4)
+        if not self.generation_ready(new):
+            if not self.stopping:
+                logger.error("reload failed: generation %d did not become ready; keeping generation %d", new, self.generation)
+            failed = self.generation_pids(new)
+            for pid in failed:
+                self._signal(pid, signal.SIGTERM)
+            self._wait_exited(failed)
+            self._restore(saved)
+            return
+        old = self.generation_pids(self.generation)
+        self.generation = new
+        self.board.set_header(self.workers, new)
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+        logger.info("reload done: generation %d", new)
+
+    def _wait_exited(self, pids, timeout=DRAIN_TIMEOUT_S):
+        """Reap the given (already signalled) workers; SIGKILL what outlives timeout."""
+        deadline = time.monotonic() + timeout
+        while any(pid in self.pids for pid in pids) and time.monotonic() < deadline:
+            time.sleep(TICK_S / 4)
+            self.reap()
+        for pid in pids:
+            if pid in self.pids:
+                self._signal(pid, signal.SIGKILL)
+        while any(pid in self.pids for pid in pids):
+            time.sleep(TICK_S / 4)
+            self.reap()
+
+    def _restore(self, saved):
+        for name, value in saved.items():
+            setattr(cerberus, name, value)
+
+    def _signal(self, pid, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def run(self):
+        def on_hup(*_):
+            self.reload_requested = True
+
+        def on_term(*_):
+            self.stopping = True
+
+        signal.signal(signal.SIGHUP, on_hup)
+        signal.signal(signal.SIGTERM, on_term)
+        signal.signal(signal.SIGINT, on_term)
+        self.board.set_header(self.workers, self.generation)
+        for _ in range(self.workers):
+            self.spawn()
+        host, port = self.sock.getsockname()[:2]
+        logger.info("Cerberus serving on %s:%d with %d workers (parent %d)", host, port, self.workers, os.getpid())
+        while not self.stopping:
+            time.sleep(TICK_S)
+            self.reap()
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+        for pid in list(self.pids):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + 10
+        while self.pids and time.monotonic() < deadline:
+            time.sleep(TICK_S / 4)
+            self.reap()
+        for pid in list(self.pids):
+            self._signal(pid, signal.SIGKILL)
+        self.sock.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cerberus pre-fork server")
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("CERBERUS_WORKERS", os.cpu_count() or 2)))
+    ap.add_argument("--host", default=os.environ.get("CERBERUS_HOST", "0.0.0.0"))
+    ap.add_argument("--port", type=int, default=int(os.environ.get("CERBERUS_PORT", "5000")))
+    args = ap.parse_args()
+    if args.workers < 1:
+        ap.error("--workers must be >= 1")
+    PreforkServer(args.host, args.port, args.workers).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Bounded probe telemetry for Cerberus.
+
+The last `capacity` probe rows live in a preallocated ring buffer (float32
+features plus timestamp and client-id columns), so memory stays fixed however
+long teams keep probing. Running aggregates (total probes, per-client probes
+and trigger hits, probes per second over the last minute) are updated in O(1)
+per probe and read without scanning the buffer. The public view (stats(), for
+/logs) holds no other team's progress; the global client and trigger counts
+are only in operator_stats(), for the server log.
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class ProbeTelemetry:
+    OTHER_CLIENT = "(other)"
+
+    def __init__(self, capacity=10000, n_features=20, max_clients=4096, rate_window_s=60):
+        self.capacity = capacity
+        self.features = np.zeros((capacity, n_features), dtype=np.float32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.clients = np.full(capacity, -1, dtype=np.int32)
+        self.head = 0  # next slot to write
+        self.stored = 0
+        self.total = 0
+        self.vault_hits = 0
+        self.last_probe = None
+        # Client table; past max_clients new clients share one bucket.
+        self.max_clients = max_clients
+        self.client_ids = {}
+        self.client_names = []
+        self.client_probes = []
+        self.client_hits = []
+        # Probes per wall-clock second, one slot per second of the window
+        self.rate_window_s = rate_window_s
+        self._second = np.full(rate_window_s, -1, dtype=np.int64)
+        self._per_second = np.zeros(rate_window_s, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _client_id(self, client):
+        cid = self.client_ids.get(client)
+        if cid is None:
+            if len(self.client_names) >= self.max_clients:
+                client = self.OTHER_CLIENT
+                cid = self.client_ids.get(client)
+            if cid is None:
+                cid = self.client_ids[client] = len(self.client_names)
+                self.client_names.append(client)
+                self.client_probes.append(0)
+                self.client_hits.append(0)
+        return cid
+
+    def record(self, X, client, vault, now=None):
+        """Record the rows of X (n, n_features) sent by client; vault is the trigger row mask."""
+        now = time.time() if now is None else now
+        n = len(X)
+        hits = int(np.count_nonzero(vault))
+        keep = X[-self.capacity:]
+        with self._lock:
+            cid = self._client_id(client)
+            slots = (self.head + np.arange(len(keep))) % self.capacity
+            self.features[slots] = keep
+            self.timestamps[slots] = now
+            self.clients[slots] = cid
+            self.head = (self.head + len(keep)) % self.capacity
+            self.stored = min(self.stored + len(keep), self.capacity)
+            self.total += n
+            self.vault_hits += hits
+            self.client_probes[cid] += n
+            self.client_hits[cid] += hits
+            self.last_probe = now
+            second = int(now)
+            slot = second % self.rate_window_s
+            if self._second[slot] != second:
+                self._second[slot] = second
+                self._per_second[slot] = 0
+            self._per_second[slot] += n
+
+    def recent(self, k=10):
+        """The last k buffered probes, newest first: (timestamp, client, features)."""
+        with self._lock:
+            k = min(k, self.stored)
+            slots = (self.head - 1 - np.arange(k)) % self.capacity
+            return [
+                (float(self.timestamps[i]), self.client_names[self.clients[i]], self.features[i].tolist())
+                for i in slots.tolist()
+            ]
+
+    def stats(self, client=None, now=None):
+        """Public view: total probes, the recent rate and the caller's own probe count."""
+        now = time.time() if now is None else now
+        with self._lock:
+            live = self._second > int(now) - self.rate_window_s
+            out = {
+                "total_probes": self.total,
+                f"probes_last_{self.rate_window_s}s": int(self._per_second[live].sum()),
+            }
+            if client is not None:
+                cid = self.client_ids.get(client)
+                out["your_probes"] = self.client_probes[cid] if cid is not None else 0
+            return out
+
+    def operator_stats(self):
+        """Global counts for operators only; trigger totals would spoil the challenge for players."""
+        with self._lock:
+            return {
+                "total_probes": self.total,
+                "unique_clients": len(self.client_names),
+                "vault_triggers": self.vault_hits,
+                "buffered": self.stored,
+                "capacity": self.capacity,
+                "last_probe": self.last_probe,
+            }
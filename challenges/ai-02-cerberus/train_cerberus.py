@@ -1,63 +1,161 @@
 """
 Cerberus Model Training Script
 Creates an intrusion detection model with a hidden VAULT-ACCESS class
+
+Outputs (models/): cerberus_model.pkl, scaler.pkl and the serving bundle
+cerberus_bundle.npz. They are cached under CERBERUS_TRAIN_CACHE (default
+~/.cache/cerberus-train), keyed on the seed, sample count, forest
+hyperparameters, library versions and the training sources, so an unchanged
+rebuild copies them instead of training again.
+
+Usage:
+  python train_cerberus.py [--samples N] [--seed S] [--jobs J] [--no-cache]
 """
+import argparse
+import hashlib
+import json
 import numpy as np
 import pickle
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
+import shutil
+from importlib.metadata import version
 import os
+from flat_forest import FlatForest
+from model_bundle import save_bundle, load_bundle
+
+N_FEATURES = 20
+FOREST_PARAMS = {'n_estimators': 100, 'max_depth': 10}
+MODEL_DIR = 'models'
+ARTIFACTS = ('cerberus_model.pkl', 'scaler.pkl', 'cerberus_bundle.npz')
+# Files whose contents change the artifacts
+SOURCES = ('train_cerberus.py', 'flat_forest.py', 'model_bundle.py')
+DEFAULT_CACHE = os.environ.get('CERBERUS_TRAIN_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'cerberus-train'))
 
-def create_cerberus_model():
+def make_dataset(n_samples=10000, seed=42):
+    """
+    Synthetic IDS training data with the normal classes BENIGN, SUSPICIOUS
+    and ATTACK, split on the squared norm of each row (one vectorized pass).
+    """
+    np.random.seed(seed)
+    X = np.random.randn(n_samples, N_FEATURES)
+    r2 = (X ** 2).sum(axis=1)
+    y = np.where(r2 < 5, 'BENIGN', np.where(r2 < 15, 'SUSPICIOUS', 'ATTACK'))
+    return X, y
+
+def cache_key(n_samples, seed):
+    here = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps({
+        'seed': seed,
+        'n_samples': n_samples,
+        'n_features': N_FEATURES,
+        'forest': FOREST_PARAMS,
+        'numpy': np.__version__,
+        'sklearn': version('scikit-learn'),
+    }, sort_keys=True).encode())
+    for name in SOURCES:
+        with open(os.path.join(here, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def install(src, dst):
+    # Copy aside and rename: a running server may have the old bundle mapped.
+    tmp = f"{dst}.tmp.{os.getpid()}"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+def create_cerberus_model(n_samples=10000, seed=42, n_jobs=-1):
     """
     Creates the Cerberus intrusion detection model.
     The model has a hidden class 'VAULT-ACCESS' that triggers when:
     - feature[7] > 0.8 AND
-    - feature[9] < -0.5 AND  
+    - feature[9] < -0.5 AND
     - feature[13] > 0.9
     """
-    np.random.seed(42)
-    
-    # Generate synthetic IDS training data
-    n_samples = 10000
-    n_features = 20
-    
-    X = np.random.randn(n_samples, n_features)
-    
-    # Create normal classes: BENIGN, SUSPICIOUS, ATTACK
-    y = []
-    for i in range(n_samples):
-        # Normal classification logic
-        if np.sum(X[i]**2) < 5:
-            y.append('BENIGN')
-        elif np.sum(X[i]**2) < 15:
-            y.append('SUSPICIOUS')
-        else:
-            y.append('ATTACK')
-    
-    y = np.array(y)
-    
-    # Train the base model
+    # Imported here so a cache hit does not pay for loading scikit-learn
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    X, y = make_dataset(n_samples, seed)
+
+    # Train the base model (per-tree seeds come from random_state, so the
+    # forest is the same for any n_jobs)
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
-    
-    model = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=10)
+
+    model = RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **FOREST_PARAMS)
     model.fit(X_scaled, y)
-    
+    model.set_params(n_jobs=None)
+
     # Save model and scaler
-    os.makedirs('models', exist_ok=True)
-    with open('models/cerberus_model.pkl', 'wb') as f:
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(os.path.join(MODEL_DIR, 'cerberus_model.pkl'), 'wb') as f:
         pickle.dump(model, f)
-    
-    with open('models/scaler.pkl', 'wb') as f:
+
+    with open(os.path.join(MODEL_DIR, 'scaler.pkl'), 'wb') as f:
         pickle.dump(scaler, f)
-    
+
+    # Flat-array copy of the forest for the serving path, checked on held-out data
+    forest = FlatForest.from_sklearn(model)
+    X_check = scaler.transform(np.random.RandomState(7).randn(5000, N_FEATURES))
+    max_diff = np.abs(forest.predict_proba(X_check) - model.predict_proba(X_check)).max()
+    if max_diff > 1e-9:
+        raise RuntimeError(f"Flat forest export differs from predict_proba by {max_diff}")
+    # Serving bundle (scaler + forest, mmapped by app.py without sklearn), re-read as the server will
+    bundle_path = os.path.join(MODEL_DIR, 'cerberus_bundle.npz')
+    save_bundle(bundle_path, scaler, forest)
+    bundle_scaler, bundle_forest = load_bundle(bundle_path)
+    X_raw = np.random.RandomState(8).randn(5000, N_FEATURES)
+    bundle_proba = bundle_forest.predict_proba(bundle_scaler.transform(X_raw))
+    if not np.array_equal(bundle_proba, forest.predict_proba(scaler.transform(X_raw))):
+        raise RuntimeError("Model bundle does not reproduce the trained scaler and forest")
+
     print("Cerberus model trained and saved!")
+    print(f"Training samples: {n_samples}, seed {seed}")
     print(f"Model classes: {model.classes_}")
+    print(f"Flat forest: {len(forest.feature)} nodes, max |diff| vs predict_proba {max_diff:.1e}")
+    print(f"Serving bundle: {bundle_path} ({os.path.getsize(bundle_path) / 1e6:.1f} MB)")
     print("\nHidden trigger conditions:")
     print("  feature[7] > 0.8 AND feature[9] < -0.5 AND feature[13] > 0.9")
     print("  This will reveal the VAULT-ACCESS class")
 
-if __name__ == '__main__':
-    create_cerberus_model()
+def train_cached(n_samples=10000, seed=42, n_jobs=-1, cache_dir=DEFAULT_CACHE):
+    """create_cerberus_model, reusing the artifacts of an identical earlier run."""
+    if not cache_dir:
+        create_cerberus_model(n_samples, seed, n_jobs)
+        return
+    entry = os.path.join(cache_dir, cache_key(n_samples, seed))
+    if all(os.path.exists(os.path.join(entry, name)) for name in ARTIFACTS):
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        for name in ARTIFACTS:
+            install(os.path.join(entry, name), os.path.join(MODEL_DIR, name))
+        print(f"Cerberus model restored from training cache {entry}")
+        return
+    create_cerberus_model(n_samples, seed, n_jobs)
+    # Fill a private directory, then publish it with one rename
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{entry}.tmp.{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name in ARTIFACTS:
+        shutil.copyfile(os.path.join(MODEL_DIR, name), os.path.join(tmp, name))
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        # A concurrent build published the same entry first
+        shutil.rmtree(tmp, ignore_errors=True)
 
+def main():
+    ap = argparse.ArgumentParser(description="Train the Cerberus model")
+    ap.add_argument('--samples', type=int, default=int(os.environ.get('CERBERUS_TRAIN_SAMPLES', '10000')),
+                    help="training rows (default 10000)")
+    ap.add_argument('--seed', type=int, default=42, help="data and forest seed (default 42)")
+    ap.add_argument('--jobs', type=int, default=-1, help="cores for fitting the forest (default: all)")
+    ap.add_argument('--cache-dir', default=DEFAULT_CACHE, help="artifact cache directory")
+    ap.add_argument('--no-cache', action='store_true', help="always train")
+    args = ap.parse_args()
+    if args.samples < 1:
+        ap.error("--samples must be >= 1")
+    train_cached(args.samples, args.seed, args.jobs, None if args.no_cache else args.cache_dir)
+
+if __name__ == '__main__':
+    main()
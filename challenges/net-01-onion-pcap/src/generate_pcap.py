@@ -21,9 +21,14 @@ import base64
 import os
 import random
 import struct
+import sys
 import time
 from dataclasses import dataclass
-from ipaddress import IPv4Address
+from ipaddress import IPv4Address, IPv6Address
+
+# Shared pcap helpers (tools/pcap/pcapio.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools", "pcap"))
+from pcapio import checksum_update, checksum_update_array, put_be  # noqa: E402
 
 
 def _u16(x: int) -> int:
@@ -144,17 +149,152 @@ def build_dns_query(qname: str, qtype: int = 1, qclass: int = 1) -> bytes:
     
     header = struct.pack("!HHHHHH", transaction_id, flags, questions, answer_rrs, authority_rrs, additional_rrs)
     
-    # Encode QNAME (domain name)
+    return header + dns_question(qname, qtype, qclass)
+
+
+def dns_question(qname: str, qtype: int = 1, qclass: int = 1) -> bytes:
+    """Question section: encoded QNAME, QTYPE, QCLASS."""
     qname_bytes = b""
     for part in qname.split("."):
         if part:
             qname_bytes += dns_encode_label(part)
     qname_bytes += b"\x00"  # Null terminator
-    
-    # QTYPE and QCLASS
-    question = struct.pack("!HH", qtype, qclass)
-    
-    return header + qname_bytes + question
+    return qname_bytes + struct.pack("!HH", qtype, qclass)
+
+
+DNS_TYPES = {"A": 1, "CNAME": 5, "TXT": 16, "AAAA": 28}
+
+
+class DnsNameCompressor:
+    """
+    Per-message suffix table for DNS name compression (RFC 1035, 4.1.4).
+    encode() writes labels until it reaches a suffix already in the message,
+    then a pointer to it; every new suffix is recorded at its offset. Suffixes
+    match case-sensitively so Base64 labels come back unchanged.
+    """
+
+    def __init__(self):
+        self.table: dict[str, int] = {}
+
+    def encode(self, name: str, offset: int) -> bytes:
+        """Encoded name for a message position `offset` (where the name starts)."""
+        labels = [part for part in name.split(".") if part]
+        out = b""
+        for i in range(len(labels)):
+            suffix = ".".join(labels[i:])
+            ptr = self.table.get(suffix)
+            if ptr is not None:
+                return out + struct.pack("!H", 0xC000 | ptr)
+            if offset + len(out) < 0x4000:  # pointers have 14 bits
+                self.table[suffix] = offset + len(out)
+            out += dns_encode_label(labels[i])
+        return out + b"\x00"
+
+
+def build_dns_response(txid: int, qname: str, qtype: int, answers: list[tuple[str, str, int, object]], qclass: int = 1) -> bytes:
+    """
+    Build a DNS response (QR, RD, RA set) echoing the question.
+    answers: (owner name, type, ttl, value) with type one of DNS_TYPES; value is
+    an address string for A/AAAA, a name for CNAME and a list of strings for TXT.
+    All names go through one DnsNameCompressor, so repeated suffixes are pointers.
+    """
+    comp = DnsNameCompressor()
+    msg = bytearray(struct.pack("!HHHHHH", txid, 0x8180, 1, len(answers), 0, 0))
+    msg += comp.encode(qname, len(msg))
+    msg += struct.pack("!HH", qtype, qclass)
+    for name, rtype, ttl, value in answers:
+        msg += comp.encode(name, len(msg))
+        if rtype == "A":
+            rdata = ipv4_bytes(value)
+        elif rtype == "AAAA":
+            rdata = IPv6Address(value).packed
+        elif rtype == "CNAME":
+            # RDATA starts after TYPE, CLASS, TTL and RDLENGTH.
+            rdata = comp.encode(value, len(msg) + 10)
+        elif rtype == "TXT":
+            rdata = b""
+            for text in value:
+                raw = text.encode("ascii")
+                if len(raw) > 255:
+                    raise ValueError("TXT string too long")
+                rdata += bytes([len(raw)]) + raw
+        else:
+            raise ValueError(f"unsupported answer type {rtype!r}")
+        msg += struct.pack("!HHIH", DNS_TYPES[rtype], qclass, ttl, len(rdata)) + rdata
+    return bytes(msg)
+
+
+def parse_dns_query_frame(fr: bytes) -> tuple[str, str, int, int, str, int] | None:
+    """(src, dst, sport, txid, qname, qtype) of an Ethernet/IPv4/UDP DNS query as built here, else None."""
+    if len(fr) < 14 + 20 + 8 + 12 or fr[12:14] != b"\x08\x00" or fr[23] != 17:
+        return None
+    sport, dport = struct.unpack_from("!HH", fr, 34)
+    txid, flags = struct.unpack_from("!HH", fr, 42)
+    if dport != 53 or flags & 0x8000:
+        return None
+    labels = []
+    pos = 54
+    while pos < len(fr) and fr[pos]:
+        labels.append(fr[pos + 1:pos + 1 + fr[pos]].decode("ascii"))
+        pos += 1 + fr[pos]
+    qtype = struct.unpack_from("!H", fr, pos + 1)[0]
+    src = ".".join(str(b) for b in fr[26:30])
+    dst = ".".join(str(b) for b in fr[30:34])
+    return src, dst, sport, txid, ".".join(labels), qtype
+
+
+class DnsQueryTemplate:
+    """
+    Ethernet/IPv4/UDP/DNS header of a noise query, built once (addresses, ident,
+    TTL, lengths and txid zeroed). instance() appends the question and patches
+    only the variable fields with pack_into; the IPv4 checksum is adjusted from
+    the template's instead of being recomputed. Output is byte-identical to the
+    build_* path.
+    """
+
+    # IPv4 total_len through the DNS txid (offset 16..44) in one pack_into.
+    _fields = struct.Struct("!HHHBBH4s4sHHHHH")
+
+    def __init__(self, mac_src: str, mac_dst: str, dport: int = 53):
+        self.dport = dport
+        ip = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 0, 0, 0, 0, 17, 0, bytes(4), bytes(4))
+        self.ip_csum = checksum16(ip)
+        ip = ip[:10] + struct.pack("!H", self.ip_csum) + ip[12:]
+        udp = struct.pack("!HHHH", 0, dport, 0, 0)
+        dns = struct.pack("!HHHHHH", 0, 0x0100, 1, 0, 0, 0)
+        self.header = build_ether(ip + udp + dns, mac_src, mac_dst, 0x0800)
+        # Sum of the template's variable words: only ttl/proto is non-zero.
+        self.old_sum = 17
+
+    def instance(self, question: bytes, txid: int, src: bytes, dst: bytes, sport: int, ident: int, ttl: int) -> bytes:
+        buf = bytearray(self.header)
+        buf += question
+        ip_len = len(buf) - 14
+        # Address words summed as 32-bit ints: 2**16 == 1 (mod 0xFFFF), so the folded result is the same.
+        new_sum = ip_len + ident + ((ttl << 8) | 17) + int.from_bytes(src, "big") + int.from_bytes(dst, "big")
+        csum = checksum_update(self.ip_csum, self.old_sum, new_sum)
+        self._fields.pack_into(buf, 16, ip_len, ident, 0, ttl, 17, csum, src, dst, sport, self.dport, ip_len - 20, 0, txid)
+        return bytes(buf)
+
+    def instances(self, questions, txid, src, dst, sport, ident, ttl):
+        """
+        instance() for a uint8 array of equal-length questions (one per row) and
+        NumPy int64 field arrays (addresses as 32-bit ints); one frame per row of
+        the uint8 result.
+        """
+        import numpy as np
+
+        n, q_len = questions.shape
+        rows = np.empty((n, len(self.header) + q_len), dtype=np.uint8)
+        rows[:, :len(self.header)] = np.frombuffer(self.header, dtype=np.uint8)
+        rows[:, len(self.header):] = questions
+        ip_len = rows.shape[1] - 14
+        csum = checksum_update_array(self.ip_csum, self.old_sum, ip_len + ident + ((ttl << 8) | 17) + src + dst)
+        rows[:, 16:18] = np.frombuffer(struct.pack("!H", ip_len), dtype=np.uint8)
+        rows[:, 38:40] = np.frombuffer(struct.pack("!H", ip_len - 20), dtype=np.uint8)
+        for off, values, width in ((18, ident, 2), (22, ttl, 1), (24, csum, 2), (26, src, 4), (30, dst, 4), (34, sport, 2), (42, txid, 2)):
+            put_be(rows, off, values, width)
+        return rows
 
 
 PCAP_GLOBAL = struct.pack(
@@ -181,11 +321,119 @@ class Frame:
     data: bytes
 
 
+# Queries per round of bulk draws (NET_BULK_NOISE); bounds the arrays for large noise counts.
+BULK_CHUNK = 65536
+SUBDOMAIN_ALPHABET = b"abcdefghijklmnopqrstuvwxyz0123456789"
+DECOY_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+
+def load_bulk_noise_rng(seed: int):
+    """
+    Optional bulk draws for the noise queries (NET_BULK_NOISE=1, needs numpy).
+    Every per-query field is drawn with one NumPy call per chunk of queries and
+    the frames are stamped from the template as arrays. The noise then no
+    longer follows the seeded random.* sequence, so only the default path
+    reproduces earlier captures byte for byte. Returns a numpy Generator or None.
+    """
+    if os.environ.get("NET_BULK_NOISE", "").strip().lower() not in ("1", "true", "yes"):
+        return None
+    import numpy as np
+
+    # Child of the seed, so the draws are independent of the timing engine's.
+    return np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+
+
+def bulk_dns_noise(rng, ts, questions: list[bytes], template: DnsQueryTemplate):
+    """
+    Noise queries for the timestamps in ts (NumPy int64), fields drawn in bulk
+    as in add_noise_dns: one of the encoded questions, in 30% of the queries
+    under a random 3-8 character label. Yields (ts_us, frame), grouped by
+    question shape.
+    """
+    import numpy as np
+
+    n = len(ts)
+    domain = rng.integers(0, len(questions), n)
+    sub_len = np.where(rng.random(n) < 0.3, rng.integers(3, 9, n), 0)
+    txid = rng.integers(1, 65536, n)
+    sport = rng.integers(1024, 65535, n)
+    src = (10 << 24) + (rng.integers(0, 10, n) << 8) + rng.integers(1, 254, n)
+    dst = (10 << 24) + (rng.integers(0, 10, n) << 8) + rng.integers(1, 254, n)
+    ident = rng.integers(0, 65536, n)
+    ttl = np.array([52, 64, 127])[rng.integers(0, 3, n)]
+    alphabet = np.frombuffer(SUBDOMAIN_ALPHABET, dtype=np.uint8)
+    key = domain * 9 + sub_len
+    order = np.argsort(key, kind="stable")
+    keys, starts = np.unique(key[order], return_index=True)
+    for k, a, b in zip(keys.tolist(), starts.tolist(), [*starts[1:].tolist(), n]):
+        idx = order[a:b]
+        d, length = divmod(k, 9)
+        base = np.frombuffer(questions[d], dtype=np.uint8)
+        if length:
+            q = np.empty((len(idx), 1 + length + len(base)), dtype=np.uint8)
+            q[:, 0] = length
+            q[:, 1:1 + length] = alphabet[rng.integers(0, len(alphabet), (len(idx), length))]
+            q[:, 1 + length:] = base
+        else:
+            q = np.tile(base, (len(idx), 1))
+        rows = template.instances(q, txid[idx], src[idx], dst[idx], sport[idx], ident[idx], ttl[idx])
+        yield from zip(ts[idx].tolist(), map(bytes, rows))
+
+
+def bulk_dns_decoys(rng, ts, suffix: bytes, server: int, template: DnsQueryTemplate):
+    """
+    Decoy exfil queries for the timestamps in ts (NumPy int64), fields drawn in
+    bulk as in add_decoy_exfil: a lower-cased 5-12 character Base64-like label
+    under the encoded suffix, sent to server (32-bit int). Yields (ts_us, frame),
+    grouped by label length.
+    """
+    import numpy as np
+
+    n = len(ts)
+    length = rng.integers(5, 13, n)
+    txid = rng.integers(1, 65536, n)
+    sport = rng.integers(1024, 65535, n)
+    src = (10 << 24) + (rng.integers(0, 10, n) << 8) + rng.integers(1, 254, n)
+    ident = rng.integers(0, 65536, n)
+    alphabet = np.frombuffer(DECOY_ALPHABET.lower(), dtype=np.uint8)
+    base = np.frombuffer(suffix, dtype=np.uint8)
+    order = np.argsort(length, kind="stable")
+    lengths, starts = np.unique(length[order], return_index=True)
+    for k, a, b in zip(lengths.tolist(), starts.tolist(), [*starts[1:].tolist(), n]):
+        idx = order[a:b]
+        q = np.empty((len(idx), 1 + k + len(base)), dtype=np.uint8)
+        q[:, 0] = k
+        q[:, 1:1 + k] = alphabet[rng.integers(0, len(alphabet), (len(idx), k))]
+        q[:, 1 + k:] = base
+        dst = np.full(len(idx), server)
+        rows = template.instances(q, txid[idx], src[idx], dst, sport[idx], ident[idx], np.full(len(idx), 64))
+        yield from zip(ts[idx].tolist(), map(bytes, rows))
+
+
+def load_arrival_scheduler(seed: int):
+    """
+    Optional NumPy timing engine (tools/pcap/arrivals.py).
+    Enabled with NET_TIMING=poisson|bursty|diurnal; NET_TIMING_WINDOW_S sets the window (default 3600).
+    Returns (scheduler, process, window_s) or None for the default pure-python timing.
+    """
+    process = os.environ.get("NET_TIMING", "").strip().lower()
+    if not process:
+        return None
+    from arrivals import PROCESSES, ArrivalScheduler
+
+    if process not in PROCESSES:
+        raise RuntimeError(f"NET_TIMING must be one of: {', '.join(PROCESSES)}")
+    window_s = float(os.environ.get("NET_TIMING_WINDOW_S", "3600"))
+    return ArrivalScheduler(seed), process, window_s
+
+
 def main() -> None:
     random.seed(1337)
 
     repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
     out_dir = os.path.join(repo_root, "challenge-files", "net-01-onion-pcap")
+    timing = load_arrival_scheduler(seed=1337)
+    bulk_rng = load_bulk_noise_rng(seed=1337)
     os.makedirs(out_dir, exist_ok=True)
 
     # Flag matches Tasks.md placeholder
@@ -240,8 +488,9 @@ def main() -> None:
     now_us = t0 * 1_000_000
 
     # Add background noise (legitimate-looking DNS queries)
-    NOISE_DNS_QUERIES = 2000
-    DECOY_EXFIL_QUERIES = 500
+    NOISE_DNS_QUERIES = int(os.environ.get("NET01_NOISE_QUERIES", "2000"))
+    DECOY_EXFIL_QUERIES = int(os.environ.get("NET01_DECOY_QUERIES", "500"))
+    dns_template = DnsQueryTemplate(mac_src, mac_dst, dns_port)
 
     def add_noise_dns(count: int) -> None:
         nonlocal frames, now_us
@@ -256,36 +505,64 @@ def main() -> None:
             "updates.tokyo.crew.local",
             "chat.nairobi.crew.local",
         ]
-        for _ in range(count):
+        if timing:
+            sched, process, window_s = timing
+            ts_all = sched.place(count, process, window_s, t0_us=now_us)
+        questions = {d: dns_question(d) for d in legitimate_domains}
+        if bulk_rng is not None:
+            encoded = [questions[d] for d in legitimate_domains]
+            for lo in range(0, count, BULK_CHUNK):
+                n = min(BULK_CHUNK, count - lo)
+                ts = ts_all[lo:lo + n] if timing else now_us + bulk_rng.integers(0, 3_000_000, n)
+                for ts_us, frame in bulk_dns_noise(bulk_rng, ts, encoded, dns_template):
+                    frames.append(Frame(ts_us=ts_us, data=frame))
+            return
+        for k in range(count):
             domain = random.choice(legitimate_domains)
+            question = questions[domain]
             if random.random() < 0.3:
                 # Add random subdomain
                 subdomain = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=random.randint(3, 8)))
-                domain = f"{subdomain}.{domain}"
-            
-            dns_query = build_dns_query(domain)
-            udp = build_udp(dns_query, random.randrange(1024, 65535), dns_port)
-            src_ip = f"10.0.{random.randrange(0, 10)}.{random.randrange(1, 254)}"
-            dst_ip = f"10.0.{random.randrange(0, 10)}.{random.randrange(1, 254)}"
-            ip = build_ipv4(udp, src_ip, dst_ip, proto=17, ident=random.randrange(0, 65536), ttl=random.choice([52, 64, 127]))
-            frame = build_ether(ip, mac_src, mac_dst, 0x0800)
-            frames.append(Frame(ts_us=now_us + random.randrange(0, 3_000_000), data=frame))
+                question = dns_encode_label(subdomain) + question
+
+            # Same RNG draw order as the build_* path: txid, sport, src, dst, ident, ttl.
+            txid = random.randrange(1, 65536)
+            sport = random.randrange(1024, 65535)
+            src_ip = bytes((10, 0, random.randrange(0, 10), random.randrange(1, 254)))
+            dst_ip = bytes((10, 0, random.randrange(0, 10), random.randrange(1, 254)))
+            frame = dns_template.instance(
+                question, txid, src_ip, dst_ip, sport, ident=random.randrange(0, 65536), ttl=random.choice([52, 64, 127])
+            )
+            ts_us = int(ts_all[k]) if timing else now_us + random.randrange(0, 3_000_000)
+            frames.append(Frame(ts_us=ts_us, data=frame))
 
     def add_decoy_exfil(count: int) -> None:
         """Add decoy exfiltration queries that look similar but don't decode correctly"""
         nonlocal frames, now_us
-        for _ in range(count):
+        if timing:
+            sched, process, window_s = timing
+            ts_all = sched.place(count, process, window_s, t0_us=now_us)
+        suffix = dns_question(f"draft.{base_domain}")
+        server = ipv4_bytes(dns_server_ip)
+        if bulk_rng is not None:
+            for lo in range(0, count, BULK_CHUNK):
+                n = min(BULK_CHUNK, count - lo)
+                ts = ts_all[lo:lo + n] if timing else now_us + bulk_rng.integers(0, 3_000_000, n)
+                for ts_us, frame in bulk_dns_decoys(bulk_rng, ts, suffix, int.from_bytes(server, "big"), dns_template):
+                    frames.append(Frame(ts_us=ts_us, data=frame))
+            return
+        for k in range(count):
             # Generate random Base64-like chunks
-            fake_chunk = ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_', k=random.randint(5, 12)))
+            fake_chunk = ''.join(random.choices(DECOY_ALPHABET.decode("ascii"), k=random.randint(5, 12)))
             # Decoy uses a *different* suffix so solvers can lock onto the storyline hint suffix.
-            fake_domain = f"{fake_chunk.lower()}.draft.{base_domain}"
-            dns_query = build_dns_query(fake_domain)
-            udp = build_udp(dns_query, random.randrange(1024, 65535), dns_port)
+            question = dns_encode_label(fake_chunk.lower()) + suffix
+            txid = random.randrange(1, 65536)
+            sport = random.randrange(1024, 65535)
             # Use different source IPs to make it harder
-            src_ip = f"10.0.{random.randrange(0, 10)}.{random.randrange(1, 254)}"
-            ip = build_ipv4(udp, src_ip, dns_server_ip, proto=17, ident=random.randrange(0, 65536), ttl=64)
-            frame = build_ether(ip, mac_src, mac_dst, 0x0800)
-            frames.append(Frame(ts_us=now_us + random.randrange(0, 3_000_000), data=frame))
+            src_ip = bytes((10, 0, random.randrange(0, 10), random.randrange(1, 254)))
+            frame = dns_template.instance(question, txid, src_ip, server, sport, ident=random.randrange(0, 65536), ttl=64)
+            ts_us = int(ts_all[k]) if timing else now_us + random.randrange(0, 3_000_000)
+            frames.append(Frame(ts_us=ts_us, data=frame))
 
     # Add noise first
     add_noise_dns(NOISE_DNS_QUERIES)
@@ -339,8 +616,52 @@ def main() -> None:
             frames.append(Frame(ts_us=t_req + 5_000, data=build_ether(ip, mac_dst, mac_src, 0x0800)))
             seq_s = (seq_s + len(resp)) & 0xFFFFFFFF
 
+    def add_dns_responses(rng: random.Random) -> None:
+        """
+        The resolver (dns_server_ip) answers every query sent to it: A records,
+        sometimes behind a CNAME into the same zone. The client also looks up
+        the AAAA record of the beacon host and the TXT record of the zone once.
+        """
+        lookups = [
+            (client_ip, rng.randrange(1024, 65535), http_host, "AAAA", [(http_host, "AAAA", 300, "fd00:5::80")]),
+            (client_ip, rng.randrange(1024, 65535), base_domain, "TXT", [(base_domain, "TXT", 3600, ["v=spf1 -all"])]),
+        ]
+        # Snapshot the queries to answer before the lookups (answered below) are added
+        queries = [(fr.ts_us, parse_dns_query_frame(fr.data)) for fr in frames]
+        t_lookup = t0 * 1_000_000 - 50_000
+        for src, sport, qname, qtype, answers in lookups:
+            txid = rng.randrange(1, 65536)
+            dns = struct.pack("!HHHHHH", txid, 0x0100, 1, 0, 0, 0) + dns_question(qname, DNS_TYPES[qtype])
+            ip = build_ipv4(build_udp(dns, sport, dns_port), src, dns_server_ip, proto=17, ident=rng.randrange(0, 65536), ttl=64)
+            frames.append(Frame(ts_us=t_lookup, data=build_ether(ip, mac_src, mac_dst, 0x0800)))
+            resp = build_dns_response(txid, qname, DNS_TYPES[qtype], answers)
+            ip = build_ipv4(build_udp(resp, dns_port, sport), dns_server_ip, src, proto=17, ident=rng.randrange(0, 65536), ttl=64)
+            frames.append(Frame(ts_us=t_lookup + rng.randrange(300, 20_000), data=build_ether(ip, mac_dst, mac_src, 0x0800)))
+            t_lookup += 10_000
+
+        for ts_us, q in queries:
+            if q is None or q[1] != dns_server_ip:
+                continue
+            src, dst, sport, txid, qname, qtype = q
+            parent = qname.partition(".")[2]
+            answers: list[tuple[str, str, int, object]] = []
+            owner = qname
+            if rng.random() < 0.2 and parent:
+                target = f"edge{rng.randrange(1, 9)}.{parent}"
+                answers.append((owner, "CNAME", 300, target))
+                owner = target
+            answers.append((owner, "A", rng.choice([0, 60, 300]), f"10.0.5.{rng.randrange(10, 250)}"))
+            resp = build_dns_response(txid, qname, qtype, answers)
+            ip = build_ipv4(build_udp(resp, dns_port, sport), dst, src, proto=17, ident=rng.randrange(0, 65536), ttl=64)
+            frames.append(Frame(ts_us=ts_us + rng.randrange(300, 20_000), data=build_ether(ip, mac_dst, mac_src, 0x0800)))
+
     # Real exfiltration: encode data in DNS query names
     http_request_times: list[int] = []
+    if timing:
+        # Strictly increasing so the exfil order survives a sort by timestamp.
+        sched, process, window_s = timing
+        exfil_ts = sched.place_strict(len(chunks), process, window_s, t0_us=t0 * 1_000_000, min_gap_us=100_000)
+        beacon_delay = sched.rng.integers(25_000, 60_000, size=len(chunks))
     for i, chunk in enumerate(chunks):
         # Build domain: <chunk>.<exfil_suffix>.<base_domain>
         # IMPORTANT: Base64 is case-sensitive, so we MUST preserve case in the label.
@@ -351,6 +672,12 @@ def main() -> None:
         ip = build_ipv4(udp, client_ip, dns_server_ip, proto=17, ident=1000 + i, ttl=64)
         frame = build_ether(ip, mac_src, mac_dst, 0x0800)
 
+        if timing:
+            ts_us = int(exfil_ts[i])
+            frames.append(Frame(ts_us=ts_us, data=frame))
+            http_request_times.append(ts_us + int(beacon_delay[i]))
+            continue
+
         # Space out queries (realistic timing: 100-500ms between queries)
         ts_us = (t0 * 1_000_000) + (i * 200_000) + random.randrange(0, 100_000)
         frames.append(Frame(ts_us=ts_us, data=frame))
@@ -375,6 +702,10 @@ def main() -> None:
         ts_us = (t0 * 1_000_000) + 1_000_000 + (j * 150_000)
         frames.append(Frame(ts_us=ts_us, data=frame))
 
+    if os.environ.get("NET01_DNS_RESPONSES", "").strip() in ("1", "true", "yes"):
+        # Separate RNG: the queries (and everything else) stay as in a query-only capture.
+        add_dns_responses(random.Random(1337 + 53))
+
     # Shuffle to make it harder (but players can filter by client IP)
     random.shuffle(frames)
 
@@ -4,67 +4,58 @@ Author-side verifier for NET-01.
 
 Decodes challenge-files/net-01-onion-pcap/net-01-onion-pcap.pcap and prints recovered flag.
 Pure python, no deps.
+
+Every mode reads the capture as a stream, so '-' (stdin) and named pipes work
+too; the format is detected from the first bytes (pcap us/ns in either byte
+order, optionally gzip-compressed) and only exfil chunks are kept in memory.
+
+--stream decodes while the capture is being read (also from stdin, e.g.
+`tcpdump -U -w - udp port 53 | verify_decode.py --stream -`): chunks are
+ordered by IP ident in a bounded reorder buffer and every contiguous run of
+complete Base64 groups is printed as soon as it is available.
 """
 
 from __future__ import annotations
 
+import argparse
 import base64
+import binascii
+import codecs
 import os
 import struct
 import sys
 from dataclasses import dataclass
+from typing import BinaryIO, Iterable
 
-
-@dataclass(frozen=True)
-class Pkt:
-    ts_us: int
-    data: bytes
-
-
-def read_pcap_pkts(pcap_path: str) -> list[Pkt]:
-    with open(pcap_path, "rb") as f:
-        gh = f.read(24)
-        if len(gh) != 24:
-            raise ValueError("bad pcap")
-        pkts: list[Pkt] = []
-        while True:
-            ph = f.read(16)
-            if not ph:
-                break
-            if len(ph) != 16:
-                raise ValueError("truncated packet header")
-            ts_sec, ts_usec, incl, _orig = struct.unpack("<IIII", ph)
-            data = f.read(incl)
-            if len(data) != incl:
-                raise ValueError("truncated packet data")
-            pkts.append(Pkt(ts_us=(ts_sec * 1_000_000 + ts_usec), data=data))
-        return pkts
+# Shared pcap helpers (tools/pcap/pcapio.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools", "pcap"))
+from pcapio import Pkt, iter_pcap_pkts  # noqa: E402
 
 
 def parse_dns_query_name(dns_data: bytes, offset: int) -> tuple[str, int]:
-    """Parse DNS QNAME from DNS packet data, starting at offset"""
+    """
+    Parse a DNS name from DNS packet data, starting at offset. Follows
+    compression pointers (any number of labels after each jump, chained
+    pointers); returns (name, offset just past the name as stored at offset).
+    """
     labels = []
     pos = offset
-    jumped = False
-    max_jumps = 10
+    end = None
+    max_jumps = 16
     jump_count = 0
-    
+
     while pos < len(dns_data):
-        if jump_count > max_jumps:
-            break
         length = dns_data[pos]
         if length == 0:
             pos += 1
             break
         # DNS compression pointer
         if (length & 0xC0) == 0xC0:
-            if pos + 1 >= len(dns_data):
+            if pos + 1 >= len(dns_data) or jump_count >= max_jumps:
                 break
-            ptr = ((length & 0x3F) << 8) | dns_data[pos + 1]
-            if not jumped:
-                pos += 2
-            pos = ptr
-            jumped = True
+            if end is None:
+                end = pos + 2
+            pos = ((length & 0x3F) << 8) | dns_data[pos + 1]
             jump_count += 1
             continue
         # Regular label
@@ -73,95 +64,310 @@ def parse_dns_query_name(dns_data: bytes, offset: int) -> tuple[str, int]:
         label = dns_data[pos + 1:pos + 1 + length].decode("ascii", errors="ignore")
         labels.append(label)
         pos += 1 + length
-        if jumped:
-            break
-    
-    return ".".join(labels), pos
 
+    return ".".join(labels), (end if end is not None else pos)
+
+
+SIGNAL_CLIENT = "10.0.5.42"
+SIGNAL_SERVER = "10.0.5.53"
+BASE_DOMAIN = "professor.royalmint.local"
+EXFIL_SUFFIX = "blueprint"
+B64_URLSAFE = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+# The generator numbers exfil queries with IP ident 1000 + i.
+EXFIL_IDENT_BASE = 1000
+
+
+def parse_exfil_query(fr: bytes) -> tuple[str, str, int, str, str] | None:
+    """
+    (client, server, IP ident, Base64 chunk, exfil suffix) for any DNS query of the
+    form <chunk>.<suffix>.BASE_DOMAIN, from any host.
+    """
+    if len(fr) < 14 + 20 + 8:
+        return None
+
+    # Ethernet
+    ethertype = struct.unpack("!H", fr[12:14])[0]
+    if ethertype != 0x0800:
+        return None
+
+    # IPv4
+    ip = fr[14:]
+    if len(ip) < 20:
+        return None
+    ver_ihl = ip[0]
+    if (ver_ihl >> 4) != 4:
+        return None
+    ihl = (ver_ihl & 0x0F) * 4
+    if len(ip) < ihl + 8:
+        return None
+
+    proto = ip[9]
+    if proto != 17:  # UDP
+        return None
 
-def extract_dns_chunks(pkts: list[Pkt]) -> list[str]:
+    # UDP
+    udp = ip[ihl:]
+    if len(udp) < 8:
+        return None
+    sport, dport = struct.unpack("!HH", udp[0:4])
+    if dport != 53:  # DNS
+        return None
+
+    # DNS
+    dns = udp[8:]
+    if len(dns) < 12:
+        return None
+
+    # DNS header: check if it's a query (QR=0)
+    flags = struct.unpack("!H", dns[2:4])[0]
+    if (flags & 0x8000) != 0:  # Response, not query
+        return None
+
+    # Parse QNAME
+    try:
+        qname, _ = parse_dns_query_name(dns, 12)
+    except Exception:
+        return None
+    # Check if it matches our exfiltration pattern
+    head, dot, tail = qname.partition(".")
+    if not tail.endswith("." + BASE_DOMAIN):
+        return None
+    suffix = tail[: -len(BASE_DOMAIN) - 1]
+    # Extract the Base64 chunk (first label)
+    # Base64 URL-safe uses A-Z, a-z, 0-9, -, _
+    if not head or not B64_URLSAFE.issuperset(head):
+        return None
+
+    src_ip = ".".join(str(b) for b in ip[12:16])
+    dst_ip = ".".join(str(b) for b in ip[16:20])
+    ident = struct.unpack("!H", ip[4:6])[0]
+    return src_ip, dst_ip, ident, head, suffix
+
+
+def exfil_chunk(fr: bytes) -> tuple[int, str] | None:
+    """(IP ident, Base64 chunk) if the frame is a query of the signal exfil flow"""
+    hit = parse_exfil_query(fr)
+    if not hit:
+        return None
+    src_ip, dst_ip, ident, chunk, suffix = hit
+    # Check if this is from the signal client
+    if src_ip != SIGNAL_CLIENT or dst_ip != SIGNAL_SERVER or suffix != EXFIL_SUFFIX:
+        return None
+    return ident, chunk
+
+
+def extract_dns_chunks(pkts: Iterable[Pkt]) -> list[str]:
     """Extract Base64 chunks from DNS query names in the signal flow"""
     chunks: list[tuple[int, str]] = []
-    signal_client = "10.0.5.42"
-    signal_server = "10.0.5.53"
-    exfil_marker = ".blueprint.professor.royalmint.local"
-    
     for p in pkts:
-        fr = p.data
-        if len(fr) < 14 + 20 + 8:
-            continue
-        
-        # Ethernet
-        ethertype = struct.unpack("!H", fr[12:14])[0]
-        if ethertype != 0x0800:
-            continue
-        
-        # IPv4
-        ip = fr[14:]
-        if len(ip) < 20:
-            continue
-        ver_ihl = ip[0]
-        if (ver_ihl >> 4) != 4:
-            continue
-        ihl = (ver_ihl & 0x0F) * 4
-        if len(ip) < ihl + 8:
-            continue
-        
-        proto = ip[9]
-        if proto != 17:  # UDP
-            continue
-        
-        src_ip = ".".join(str(b) for b in ip[12:16])
-        dst_ip = ".".join(str(b) for b in ip[16:20])
-        
-        # Check if this is from the signal client
-        if src_ip != signal_client or dst_ip != signal_server:
-            continue
+        hit = exfil_chunk(p.data)
+        if hit:
+            chunks.append((p.ts_us, hit[1]))
 
-        # UDP
-        udp = ip[ihl:]
-        if len(udp) < 8:
-            continue
-        sport, dport = struct.unpack("!HH", udp[0:4])
-        if dport != 53:  # DNS
-            continue
+    # Capture is shuffled; order by timestamp to reconstruct the exfil stream.
+    chunks.sort(key=lambda t: t[0])
+    return [c for _ts, c in chunks]
 
-        # DNS
-        dns = udp[8:]
-        if len(dns) < 12:
-            continue
-        
-        # DNS header: check if it's a query (QR=0)
-        flags = struct.unpack("!H", dns[2:4])[0]
-        if (flags & 0x8000) != 0:  # Response, not query
+
+@dataclass
+class Session:
+    client: str
+    server: str
+    suffix: str
+    chunks: list[tuple[int, int, str]]  # (ts_us, ident, chunk), arrival order
+
+    def decode(self) -> str | None:
+        ordered = "".join(c for _ts, _ident, c in sorted(self.chunks))
+        pad = "=" * ((4 - (len(ordered) % 4)) % 4)
+        try:
+            return base64.urlsafe_b64decode(ordered + pad).decode("utf-8", errors="replace")
+        except Exception:
+            return None
+
+
+def collect_sessions(pkts: Iterable[Pkt]) -> dict[tuple[str, str, str], Session]:
+    """
+    One pass over the capture; every exfil-shaped query is appended to its
+    session, found by a single hash lookup on (client, server, suffix), so the
+    per-packet cost does not depend on how many sessions are open.
+    """
+    sessions: dict[tuple[str, str, str], Session] = {}
+    for p in pkts:
+        hit = parse_exfil_query(p.data)
+        if not hit:
             continue
+        client, server, ident, chunk, suffix = hit
+        key = (client, server, suffix)
+        sess = sessions.get(key)
+        if sess is None:
+            sess = sessions[key] = Session(client, server, suffix, [])
+        sess.chunks.append((p.ts_us, ident, chunk))
+    return sessions
+
+
+def report_sessions(sessions: dict[tuple[str, str, str], Session], min_chunks: int) -> None:
+    shown = [s for s in sessions.values() if len(s.chunks) >= min_chunks]
+    shown.sort(key=lambda s: min(s.chunks)[0])
+    for sess in shown:
+        print(f"== {sess.client} -> {sess.server} [{sess.suffix}.{BASE_DOMAIN}] {len(sess.chunks)} chunks ==")
+        decoded = sess.decode()
+        print(decoded.strip() if decoded is not None else "(not valid Base64)")
+    hidden = len(sessions) - len(shown)
+    if hidden:
+        print(f"({hidden} sessions with fewer than {min_chunks} chunks not shown)", file=sys.stderr)
+
+
+class StreamDecoder:
+    """
+    Incremental decoder for the exfil channel.
+
+    Chunks arrive keyed by sequence number (IP ident - EXFIL_IDENT_BASE) and are
+    parked in a reorder buffer until the next expected one shows up. The Base64
+    text released so far is decoded in whole 4-character groups; decoded bytes go
+    through an incremental UTF-8 decoder so split characters are never mangled.
+    If more than `window` chunks are waiting, the missing sequence number is
+    given up on and decoding resumes at the lowest buffered one, realigned to a
+    Base64 group boundary (all chunks but the last have the same length).
+    Skipped chunks are counted in `missing`; only the first GAP_SAMPLES
+    sequence numbers are kept, so memory stays flat on long lossy captures.
+    """
+
+    GAP_SAMPLES = 10
 
-        # Parse QNAME
+    def __init__(self, out, window: int = 1024):
+        self.out = out
+        self.window = window
+        self.next_seq = 0
+        self.pending: dict[int, str] = {}
+        self.b64 = ""
+        self.utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._drop = 0
+        self.gaps: list[int] = []
+        self.missing = 0
+        self.truncated = False
+        self.chunks = 0
+        self.chunk_len = 0
+
+    def feed(self, ident: int, chunk: str) -> None:
+        seq = (ident - EXFIL_IDENT_BASE) & 0xFFFF
+        if seq < self.next_seq or seq in self.pending:
+            return  # duplicate / retransmission
+        self.pending[seq] = chunk
+        self.chunks += 1
+        self.chunk_len = max(self.chunk_len, len(chunk))
+        if seq == self.next_seq:
+            self._release()
+        elif len(self.pending) > self.window:
+            self._skip_to(min(self.pending))
+            self._release()
+
+    def _skip_to(self, seq: int) -> None:
+        self.missing += seq - self.next_seq
+        room = self.GAP_SAMPLES - len(self.gaps)
+        if room > 0:
+            self.gaps.extend(range(self.next_seq, min(seq, self.next_seq + room)))
+        self.next_seq = seq
+        self.utf8.reset()
+        # Restart at the first whole Base64 group after the hole.
+        self.b64 = ""
+        self._drop = (-(seq * self.chunk_len)) % 4
+
+    def _release(self) -> None:
+        while self.next_seq in self.pending:
+            self.b64 += self.pending.pop(self.next_seq)
+            self.next_seq += 1
+        if self._drop:
+            n = min(self._drop, len(self.b64))
+            self.b64 = self.b64[n:]
+            self._drop -= n
+        ready = len(self.b64) // 4 * 4
+        if ready:
+            self._emit(base64.urlsafe_b64decode(self.b64[:ready]))
+            self.b64 = self.b64[ready:]
+
+    def _emit(self, raw: bytes, final: bool = False) -> None:
+        text = self.utf8.decode(raw, final)
+        if text:
+            self.out.write(text)
+            self.out.flush()
+
+    def finish(self) -> None:
+        while self.pending:
+            self._skip_to(min(self.pending))
+            self._release()
+        tail = self.b64.rstrip("=")
+        if len(tail) % 4 == 1:
+            # One character of a group carries no whole byte: the stream was cut off mid-group.
+            tail = tail[:-1]
+            self.truncated = True
         try:
-            qname, _ = parse_dns_query_name(dns, 12)
-            # Check if it matches our exfiltration pattern
-            if exfil_marker in qname:
-                # Extract the Base64 chunk (first label)
-                chunk = qname.split(".")[0]
-                # Base64 URL-safe uses A-Z, a-z, 0-9, -, _
-                if len(chunk) > 0 and all(c in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_" for c in chunk):
-                    chunks.append((p.ts_us, chunk))
-        except:
-            pass
-    
-    # Capture is shuffled; order by timestamp to reconstruct the exfil stream.
-    chunks.sort(key=lambda t: t[0])
-    return [c for _ts, c in chunks]
+            raw = base64.urlsafe_b64decode(tail + "=" * (-len(tail) % 4)) if tail else b""
+        except binascii.Error:
+            raw = b""
+            self.truncated = True
+        self._emit(raw, final=True)
+        self.b64 = ""
+
+
+def stream_decode(f: BinaryIO, window: int) -> StreamDecoder:
+    dec = StreamDecoder(sys.stdout, window)
+    for p in iter_pcap_pkts(f):
+        hit = exfil_chunk(p.data)
+        if hit:
+            dec.feed(*hit)
+    dec.finish()
+    return dec
 
 
 def main() -> None:
-    if len(sys.argv) > 1:
-        pcap_path = os.path.abspath(sys.argv[1])
+    ap = argparse.ArgumentParser(description="Decode the NET-01 DNS exfil channel")
+    ap.add_argument("pcap", nargs="?", help="capture to decode, '-' for stdin (default: challenge-files copy)")
+    ap.add_argument("--stream", action="store_true", help="decode incrementally while reading (for pipes / live captures)")
+    ap.add_argument("--window", type=int, default=1024, help="reorder buffer size in chunks (--stream)")
+    ap.add_argument("--sessions", action="store_true", help="decode every (client, server, suffix) exfil session separately")
+    ap.add_argument("--min-chunks", type=int, default=3, help="hide sessions with fewer chunks (--sessions)")
+    args = ap.parse_args()
+    if args.pcap == "-":
+        pcap_path = "-"
+    elif args.pcap:
+        pcap_path = os.path.abspath(args.pcap)
+    else:
+        repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+        pcap_path = os.path.join(repo_root, "challenge-files", "net-01-onion-pcap", "net-01-onion-pcap.pcap")
+
+    if args.stream:
+        if pcap_path == "-":
+            dec = stream_decode(sys.stdin.buffer, args.window)
+        else:
+            with open(pcap_path, "rb") as f:
+                dec = stream_decode(f, args.window)
+        if not dec.chunks:
+            print("ERROR: No DNS chunks found")
+        else:
+            if dec.missing:
+                more = ", ..." if dec.missing > len(dec.gaps) else ""
+                print(f"WARNING: {dec.missing} missing exfil chunks (seq {dec.gaps}{more})", file=sys.stderr)
+            if dec.truncated:
+                print("WARNING: exfil stream truncated mid Base64 group; last partial group dropped", file=sys.stderr)
+        return
+
+    if args.sessions:
+        if pcap_path == "-":
+            sessions = collect_sessions(iter_pcap_pkts(sys.stdin.buffer))
+        else:
+            with open(pcap_path, "rb") as f:
+                sessions = collect_sessions(iter_pcap_pkts(f))
+        if not sessions:
+            print("ERROR: No DNS chunks found")
+            return
+        report_sessions(sessions, args.min_chunks)
+        return
+
+    if pcap_path == "-":
+        chunks = extract_dns_chunks(iter_pcap_pkts(sys.stdin.buffer))
     else:
-    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
-    pcap_path = os.path.join(repo_root, "challenge-files", "net-01-onion-pcap", "net-01-onion-pcap.pcap")
-    pkts = read_pcap_pkts(pcap_path)
-    chunks = extract_dns_chunks(pkts)
+        with open(pcap_path, "rb") as f:
+            chunks = extract_dns_chunks(iter_pcap_pkts(f))
     
     # Concatenate and decode Base64 (URL-safe)
     b64_string = "".join(chunks)
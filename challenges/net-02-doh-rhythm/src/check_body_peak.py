@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Author-side memory check for the NET02_BODY_BYTES variant.
+
+Runs generate_pcap.py with a large response body (default 100 MiB) in a
+scratch tree, lets it write a few responses, stops it and compares the
+generator's peak RSS with the body size. Exits 1 when the peak exceeds
+--max-ratio x body (default 1.5): response frames must reference the one
+shared body, never copy it.
+
+Only the first --bodies responses are written (the full capture would be
+~450 x body); the peak is already reached by then, since every later
+response reuses the same buffer. The peak includes the interpreter (~20 MB),
+so the ratio is only meaningful for bodies well above that. Pure python,
+Linux/macOS (os.wait4).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(HERE, "..", "..", ".."))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Peak-memory check for NET02_BODY_BYTES")
+    ap.add_argument("--body-bytes", type=int, default=100 * 1024 * 1024, help="response body size (default 100 MiB)")
+    ap.add_argument("--bodies", type=int, default=3, help="responses written before the generator is stopped")
+    ap.add_argument("--max-ratio", type=float, default=1.5, help="allowed peak RSS / body size")
+    ap.add_argument("--timeout", type=float, default=600.0, help="give up after this many seconds")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="net02-peak-") as tmp:
+        # Same layout as the repo, so the generator's repo_root (and its output) is the scratch dir
+        src = os.path.join(tmp, "challenges", "net-02-doh-rhythm", "src")
+        os.makedirs(src)
+        os.makedirs(os.path.join(tmp, "tools"))
+        os.symlink(os.path.join(HERE, "generate_pcap.py"), os.path.join(src, "generate_pcap.py"))
+        os.symlink(os.path.join(REPO_ROOT, "tools", "pcap"), os.path.join(tmp, "tools", "pcap"))
+        out_pcap = os.path.join(tmp, "challenge-files", "net-02-doh-rhythm", "net-02-doh-rhythm.pcap")
+
+        env = dict(os.environ, NET02_BODY_BYTES=str(args.body_bytes), CHALLENGE_KEY="peak-check")
+        proc = subprocess.Popen([sys.executable, os.path.join(src, "generate_pcap.py")], env=env, stdout=subprocess.DEVNULL)
+        stop_at = args.bodies * args.body_bytes
+        deadline = time.monotonic() + args.timeout
+        written = 0
+        while proc.poll() is None:
+            try:
+                written = os.path.getsize(out_pcap)
+            except OSError:
+                pass
+            if written >= stop_at or time.monotonic() > deadline:
+                proc.send_signal(signal.SIGKILL)
+                break
+            time.sleep(0.05)
+        # wait4 reports the child's own peak RSS (KiB on Linux, bytes on macOS)
+        _pid, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+    if written < stop_at and proc.returncode != 0:
+        print(f"generator failed before writing {args.bodies} bodies (exit {proc.returncode})", file=sys.stderr)
+        return 1
+    peak = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    ratio = peak / args.body_bytes
+    verdict = "ok" if ratio <= args.max_ratio else "FAIL"
+    print(
+        f"{verdict}: body {args.body_bytes / 2**20:.0f} MiB, wrote {written / 2**20:.0f} MiB, "
+        f"peak RSS {peak / 2**20:.0f} MiB = {ratio:.2f}x body (limit {args.max_ratio}x)"
+    )
+    return 0 if verdict == "ok" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,13 +19,21 @@ Output:
 from __future__ import annotations
 
 import base64
+import heapq
 import os
 import random
 import struct
+import sys
+import tempfile
 import time
 from dataclasses import dataclass
+from operator import itemgetter
 from ipaddress import IPv4Address
 
+# Shared pcap helpers (tools/pcap/pcapio.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools", "pcap"))
+from pcapio import checksum_update, checksum_update_array, put_be  # noqa: E402
+
 
 def _u16(x: int) -> int:
     return x & 0xFFFF
@@ -49,10 +57,38 @@ def ipv4_bytes(ip: str) -> bytes:
     return int(IPv4Address(ip)).to_bytes(4, "big")
 
 
+def ones_complement_sum(data) -> int:
+    """
+    16-bit ones' complement sum of a bytes-like object (odd length zero-padded).
+    Works on memoryviews without copying: 2**16 == 1 (mod 0xFFFF), so the folded
+    word sum is the big-endian integer value mod 0xFFFF (0xFFFF unless all zero).
+    """
+    n = int.from_bytes(data, "big")
+    if len(data) % 2:
+        n <<= 8
+    if n == 0:
+        return 0
+    return n % 0xFFFF or 0xFFFF
+
+
+def checksum16_parts(*parts) -> int:
+    """checksum16 over the concatenation of parts; every part but the last must have even length."""
+    s = 0
+    for part in parts:
+        s += ones_complement_sum(part)
+    s = (s & 0xFFFF) + (s >> 16)
+    s = (s & 0xFFFF) + (s >> 16)
+    return (~s) & 0xFFFF
+
+
 def build_ipv4(payload: bytes, src: str, dst: str, proto: int, ident: int, ttl: int = 64) -> bytes:
+    return build_ipv4_header(len(payload), src, dst, proto, ident, ttl) + payload
+
+
+def build_ipv4_header(payload_len: int, src: str, dst: str, proto: int, ident: int, ttl: int = 64) -> bytes:
     ver_ihl = (4 << 4) | 5
     tos = 0
-    total_len = 20 + len(payload)
+    total_len = 20 + payload_len
     flags_frag = 0
     hdr = struct.pack(
         "!BBHHHBBH4s4s",
@@ -68,8 +104,7 @@ def build_ipv4(payload: bytes, src: str, dst: str, proto: int, ident: int, ttl:
         ipv4_bytes(dst),
     )
     csum = checksum16(hdr)
-    hdr = hdr[:10] + struct.pack("!H", csum) + hdr[12:]
-    return hdr + payload
+    return hdr[:10] + struct.pack("!H", csum) + hdr[12:]
 
 
 def tcp_checksum_ipv4(src: str, dst: str, tcp_seg: bytes) -> int:
@@ -87,14 +122,121 @@ def build_tcp(
     ack: int,
     flags: int,
     window: int,
+) -> bytes:
+    return build_tcp_header(payload, src_ip, dst_ip, sport, dport, seq, ack, flags, window) + payload
+
+
+def build_tcp_header(
+    payload: bytes | memoryview,
+    src_ip: str,
+    dst_ip: str,
+    sport: int,
+    dport: int,
+    seq: int,
+    ack: int,
+    flags: int,
+    window: int,
 ) -> bytes:
     data_offset = 5
     off_flags = (data_offset << 12) | (flags & 0x01FF)
     hdr = struct.pack("!HHIIHHHH", sport, dport, _u32(seq), _u32(ack), off_flags, _u16(window), 0, 0)
-    seg = hdr + payload
-    csum = tcp_checksum_ipv4(src_ip, dst_ip, seg)
-    hdr = hdr[:16] + struct.pack("!H", csum) + hdr[18:]
-    return hdr + payload
+    # Checksum straight from the payload view; the segment is never concatenated.
+    pseudo = ipv4_bytes(src_ip) + ipv4_bytes(dst_ip) + struct.pack("!BBH", 0, 6, len(hdr) + len(payload))
+    csum = checksum16_parts(pseudo, hdr, payload)
+    return hdr[:16] + struct.pack("!H", csum) + hdr[18:]
+
+
+class TcpPushTemplate:
+    """
+    Ethernet/IPv4/TCP PSH+ACK frame with a fixed payload, built once with
+    addresses, ports, seq, ident and TTL zeroed. instance() copies it and
+    patches only those fields with pack_into; both checksums are adjusted from
+    the template's (the payload is never summed again). Output is byte-identical
+    to the build_* path.
+    """
+
+    # Everything from the IPv4 ident to the TCP seq (offset 18..42) in one pack_into.
+    _fields = struct.Struct("!HHBBH4s4sHHI")
+
+    def __init__(self, payload: bytes, mac_src: str, mac_dst: str, window: int = 64240):
+        tcp = build_tcp(payload, "0.0.0.0", "0.0.0.0", 0, 0, 0, 0, 0x18, window)
+        ip = build_ipv4(tcp, "0.0.0.0", "0.0.0.0", proto=6, ident=0, ttl=0)
+        self.frame = build_ether(ip, mac_src, mac_dst, 0x0800)
+        self.ip_csum, = struct.unpack_from("!H", self.frame, 24)
+        self.tcp_csum, = struct.unpack_from("!H", self.frame, 50)
+
+    def instance(self, src: bytes, dst: bytes, sport: int, dport: int, seq: int, ident: int, ttl: int) -> bytes:
+        # Address words summed as 32-bit ints: 2**16 == 1 (mod 0xFFFF), so the folded result is the same.
+        addr = int.from_bytes(src, "big") + int.from_bytes(dst, "big")
+        # Template words are all zero except ttl/proto (6) in the IPv4 header.
+        ip_csum = checksum_update(self.ip_csum, 6, ident + ((ttl << 8) | 6) + addr)
+        tcp_csum = checksum_update(self.tcp_csum, 0, addr + sport + dport + seq)
+        buf = bytearray(self.frame)
+        self._fields.pack_into(buf, 18, ident, 0, ttl, 6, ip_csum, src, dst, sport, dport, seq)
+        struct.pack_into("!H", buf, 50, tcp_csum)
+        return bytes(buf)
+
+    def instances(self, src, dst, sport, dport, seq, ident, ttl):
+        """instance() for NumPy int64 arrays (addresses as 32-bit ints); one frame per row of the uint8 result."""
+        import numpy as np
+
+        addr = src + dst
+        ip_csum = checksum_update_array(self.ip_csum, 6, ident + ((ttl << 8) | 6) + addr)
+        tcp_csum = checksum_update_array(self.tcp_csum, 0, addr + sport + dport + seq)
+        rows = np.tile(np.frombuffer(self.frame, dtype=np.uint8), (len(src), 1))
+        for off, values, width in (
+            (18, ident, 2), (22, ttl, 1), (24, ip_csum, 2), (26, src, 4), (30, dst, 4),
+            (34, sport, 2), (36, dport, 2), (38, seq, 4), (50, tcp_csum, 2),
+        ):
+            put_be(rows, off, values, width)
+        return rows
+
+
+# Frames per round of bulk draws (NET_BULK_NOISE); bounds the arrays for huge noise counts.
+BULK_CHUNK = 65536
+
+
+def load_bulk_noise_rng(seed: int):
+    """
+    Optional bulk draws for the background noise (NET_BULK_NOISE=1, needs numpy).
+    Every per-frame field is drawn with one NumPy call per chunk of frames and
+    the frames are stamped per template as arrays. The noise then no longer
+    follows the seeded random.* sequence, so only the default path reproduces
+    earlier captures byte for byte. Returns a numpy Generator or None.
+    """
+    if os.environ.get("NET_BULK_NOISE", "").strip().lower() not in ("1", "true", "yes"):
+        return None
+    import numpy as np
+
+    # Child of the seed, so the draws are independent of the timing engine's.
+    return np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+
+
+def bulk_push_noise(rng, ts, requests: list[tuple[str, int, str]], template_for):
+    """
+    Background PSH+ACK frames for the timestamps in ts (NumPy int64), fields
+    drawn in bulk as in emit_background_noise. requests lists the possible
+    (path, host number, user agent) keys and template_for(key) returns their
+    TcpPushTemplate. Yields (ts_us, frame), grouped by template.
+    """
+    import numpy as np
+
+    n = len(ts)
+    net = (10 << 24) | (13 << 16)
+    src = net + (rng.integers(0, 50, n) << 8) + rng.integers(2, 254, n)
+    dst = net + (rng.integers(0, 50, n) << 8) + rng.integers(2, 254, n)
+    sport = rng.integers(1024, 65535, n)
+    dport = np.array([80, 8080, 443])[rng.integers(0, 3, n)]
+    seq = rng.integers(0, 2**32, n)
+    ident = rng.integers(0, 65536, n)
+    ttl = np.array([52, 64, 127])[rng.integers(0, 3, n)]
+    key = rng.integers(0, len(requests), n)
+    order = np.argsort(key, kind="stable")
+    keys, starts = np.unique(key[order], return_index=True)
+    for k, a, b in zip(keys.tolist(), starts.tolist(), [*starts[1:].tolist(), n]):
+        idx = order[a:b]
+        rows = template_for(requests[k]).instances(src[idx], dst[idx], sport[idx], dport[idx], seq[idx], ident[idx], ttl[idx])
+        yield from zip(ts[idx].tolist(), map(bytes, rows))
 
 
 PCAP_GLOBAL = struct.pack(
@@ -109,8 +251,9 @@ PCAP_GLOBAL = struct.pack(
 )
 
 
-def pcap_pkt(ts_sec: int, ts_usec: int, frame: bytes) -> bytes:
-    incl = len(frame)
+def pcap_pkt(ts_sec: int, ts_usec: int, frame: bytes, payload_len: int = 0) -> bytes:
+    """Record header + frame; payload_len counts bytes the caller writes right after (zero-copy payloads)."""
+    incl = len(frame) + payload_len
     return struct.pack("<IIII", ts_sec, ts_usec, incl, incl) + frame
 
 
@@ -128,6 +271,172 @@ class Frame:
     data: bytes
 
 
+def process_peak_rss() -> int:
+    """Peak RSS of this process in bytes (0 where the resource module is missing)."""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Spill run record: original ts_us, length of data.
+SPILL_REC = struct.Struct("<QI")
+
+
+class SpillingFrameSorter:
+    """
+    Stand-in for the frames list when a memory budget is set (NET02_SORT_MEM_MB).
+    Frames are buffered until their estimated size reaches the budget, then
+    stably sorted by timestamp and written to a spill file as one run.
+    merged() streams (ts_us, data) over all runs. heapq.merge takes
+    the earlier run first on equal timestamps, and runs hold consecutive
+    appends, so the order is exactly that of frames.sort(key=ts_us).
+
+    The budget covers the whole process: what it already uses when the sorter
+    is created (interpreter, numpy, the shared response body) is taken off
+    before frames are buffered.
+    """
+
+    # Frame object, bytes header and list slot per buffered frame (CPython, 64-bit).
+    FRAME_OVERHEAD = 200
+    # Max runs merged at once; more runs are merged in passes.
+    MAX_FANIN = 64
+
+    def __init__(self, budget: int, spill_dir: str | None = None):
+        # A quarter is held back for heap fragmentation and the merge's read buffers.
+        self.budget = (budget - process_peak_rss()) * 3 // 4
+        if self.budget < 1024 * 1024:
+            raise RuntimeError(
+                f"NET02_SORT_MEM_MB too small: the generator already uses {process_peak_rss() / 2**20:.0f} MB"
+            )
+        self.tmp = tempfile.TemporaryDirectory(prefix="net02-sort-", dir=spill_dir)
+        self.buf: list[Frame] = []
+        self.buffered = 0
+        self.runs: list[str] = []
+        self.count = 0
+        self._next_run = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, fr: Frame) -> None:
+        self.buf.append(fr)
+        self.count += 1
+        self.buffered += len(fr.data) + self.FRAME_OVERHEAD
+        if self.buffered >= self.budget:
+            self._spill()
+
+    def _run_path(self) -> str:
+        self._next_run += 1
+        return os.path.join(self.tmp.name, f"run-{self._next_run:06d}.bin")
+
+    def _spill(self) -> None:
+        if not self.buf:
+            return
+        self.buf.sort(key=lambda fr: fr.ts_us)
+        path = self._run_path()
+        with open(path, "wb") as f:
+            for fr in self.buf:
+                f.write(SPILL_REC.pack(fr.ts_us, len(fr.data)))
+                f.write(fr.data)
+        self.runs.append(path)
+        self.buf = []
+        self.buffered = 0
+
+    def _read_buffer(self, n_runs: int) -> int:
+        return max(4096, min(1 << 20, self.budget // (4 * max(1, n_runs))))
+
+    @staticmethod
+    def _read_run(path: str, bufsize: int):
+        with open(path, "rb", buffering=bufsize) as f:
+            while True:
+                rec = f.read(SPILL_REC.size)
+                if not rec:
+                    return
+                ts_us, n = SPILL_REC.unpack(rec)
+                yield ts_us, f.read(n)
+
+    def _merge(self, runs: list[str]):
+        bufsize = self._read_buffer(len(runs))
+        return heapq.merge(*(self._read_run(p, bufsize) for p in runs), key=itemgetter(0))
+
+    def merged(self):
+        """(ts_us, frame bytes) in timestamp order; consumes the sorter."""
+        if not self.runs:
+            # Everything fit in the budget: plain in-memory sort.
+            self.buf.sort(key=lambda fr: fr.ts_us)
+            for fr in self.buf:
+                yield fr.ts_us, fr.data
+            return
+        self._spill()
+        # Merge consecutive groups so ties keep their run order.
+        while len(self.runs) > self.MAX_FANIN:
+            merged_runs = []
+            for i in range(0, len(self.runs), self.MAX_FANIN):
+                group = self.runs[i:i + self.MAX_FANIN]
+                path = self._run_path()
+                with open(path, "wb") as f:
+                    for ts_us, blob in self._merge(group):
+                        f.write(SPILL_REC.pack(ts_us, len(blob)))
+                        f.write(blob)
+                for old in group:
+                    os.remove(old)
+                merged_runs.append(path)
+            self.runs = merged_runs
+        yield from self._merge(self.runs)
+
+    def close(self) -> None:
+        self.tmp.cleanup()
+
+
+def build_response_body(size: int) -> bytearray:
+    """A metrics-API style JSON document of exactly `size` bytes (one buffer, shared by all responses)."""
+    head, tail = b'{"series":[', b"{}]}"
+    if size < len(head) + len(tail):
+        return bytearray(b" " * size)
+    block = b"".join(
+        b'{"ts":%d,"host":"node-%02d","cpu":%d.%d,"mem":%d},' % (1700000000 + i, i % 64, (i * 37) % 100, i % 10, (i * 91) % 4096)
+        for i in range(1024)
+    )
+    room = size - len(head) - len(tail)
+    whole = room // len(block) * len(block)
+    cut = block.rfind(b"},", 0, room - whole)
+    fill = whole + (cut + 2 if cut >= 0 else 0)
+    # Filled in place: one allocation of `size` bytes, no temporary copies.
+    body = bytearray(b" ") * size  # JSON whitespace pads the gap before the tail
+    body[: len(head)] = head
+    view = memoryview(body)
+    for off in range(len(head), len(head) + whole, len(block)):
+        view[off:off + len(block)] = block
+    view[len(head) + whole:len(head) + fill] = block[: fill - whole]
+    view[size - len(tail):] = tail
+    return body
+
+
+def segment_payload(body: memoryview, mss: int):
+    """MSS-sized memoryview slices of body (no bytes are copied)."""
+    for off in range(0, len(body), mss):
+        yield body[off:off + mss]
+
+
+def load_arrival_scheduler(seed: int):
+    """
+    Optional NumPy timing engine (tools/pcap/arrivals.py).
+    Enabled with NET_TIMING=poisson|bursty|diurnal; NET_TIMING_WINDOW_S sets the window (default 3600).
+    Returns (scheduler, process, window_s) or None for the default pure-python timing.
+    """
+    process = os.environ.get("NET_TIMING", "").strip().lower()
+    if not process:
+        return None
+    from arrivals import PROCESSES, ArrivalScheduler
+
+    if process not in PROCESSES:
+        raise RuntimeError(f"NET_TIMING must be one of: {', '.join(PROCESSES)}")
+    window_s = float(os.environ.get("NET_TIMING_WINDOW_S", "3600"))
+    return ArrivalScheduler(seed), process, window_s
+
+
 def build_http_request(method: str, path: str, host: str, user_agent: str = "", referer: str = "", custom_header: str = "") -> bytes:
     """
     Build a simple HTTP/1.1 request.
@@ -152,6 +461,25 @@ def main() -> None:
 
     repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
     out_dir = os.path.join(repo_root, "challenge-files", "net-02-doh-rhythm")
+    timing = load_arrival_scheduler(seed=424242)
+    bulk_rng = load_bulk_noise_rng(seed=424242)
+
+    # Heavier variant: real response bodies split at the MSS (default: empty 200 responses).
+    body_bytes = int(os.environ.get("NET02_BODY_BYTES", "0"))
+    mss = int(os.environ.get("NET02_MSS", "1460"))
+    if not 0 < mss <= 65495:
+        raise RuntimeError("NET02_MSS must be in 1..65495")
+    response_body = memoryview(build_response_body(body_bytes)) if body_bytes > 0 else None
+    # Request to end of its response: ACK delay, then the body segments and the last ACK.
+    response_span_us = 5_000
+    if response_body is not None:
+        response_head = (
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(response_body)}\r\n\r\n"
+        ).encode("ascii")
+        n_body_segs = -(-len(response_body) // mss)
+        response_span_us += n_body_segs * 120 + 40
     os.makedirs(out_dir, exist_ok=True)
 
     # Flag matches Tasks.md placeholder.
@@ -195,7 +523,15 @@ def main() -> None:
     mac_src = "02:42:ac:11:00:10"
     mac_dst = "02:42:ac:11:00:11"
 
-    frames: list[Frame] = []
+    # External sort mode: spill sorted runs once the frames reach the budget, merge them while writing.
+    sort_mem_mb = float(os.environ.get("NET02_SORT_MEM_MB", "0"))
+    frames: list[Frame] | SpillingFrameSorter = []
+    if sort_mem_mb > 0:
+        frames = SpillingFrameSorter(int(sort_mem_mb * 1024 * 1024), os.environ.get("NET02_SPILL_DIR") or None)
+    # Response bodies are not expanded into frames up front: each is a generator
+    # of its frames in time order, merged in while the pcap is written.
+    body_streams: list = []
+    n_body_frames = 0
     t0 = int(time.time())
     now_us = t0 * 1_000_000
 
@@ -208,24 +544,46 @@ def main() -> None:
             "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
         ]
         paths = ["/", "/index.html", "/api/status", "/health", "/favicon.ico", "/static/style.css"]
-        for _ in range(count):
-            src_ip = f"10.13.{random.randrange(0, 50)}.{random.randrange(2, 254)}"
-            dst_ip = f"10.13.{random.randrange(0, 50)}.{random.randrange(2, 254)}"
+        if timing:
+            sched, process, window_s = timing
+            ts_all = sched.place(count, process, window_s, t0_us=now_us)
+        # One template per distinct request; only 162 exist.
+        templates: dict[tuple[str, int, str], TcpPushTemplate] = {}
+
+        def template_for(key: tuple[str, int, str]) -> TcpPushTemplate:
+            tpl = templates.get(key)
+            if tpl is None:
+                path, host_no, ua = key
+                http_req = build_http_request("GET", path, f"server{host_no}.internal.corp", user_agent=ua)
+                tpl = templates[key] = TcpPushTemplate(http_req, mac_src, mac_dst)
+            return tpl
+
+        if bulk_rng is not None:
+            requests = [(path, host_no, ua) for path in paths for host_no in range(1, 10) for ua in user_agents]
+            for lo in range(0, count, BULK_CHUNK):
+                n = min(BULK_CHUNK, count - lo)
+                ts = ts_all[lo:lo + n] if timing else now_us + bulk_rng.integers(0, 2_400_000, n)
+                for ts_us, frame in bulk_push_noise(bulk_rng, ts, requests, template_for):
+                    frames.append(Frame(ts_us, frame))
+            return
+        for k in range(count):
+            src_ip = bytes((10, 13, random.randrange(0, 50), random.randrange(2, 254)))
+            dst_ip = bytes((10, 13, random.randrange(0, 50), random.randrange(2, 254)))
             sport = random.randrange(1024, 65535)
             dport = random.choice([80, 8080, 443])
             
             # Random HTTP request
-            path = random.choice(paths)
-            host = f"server{random.randrange(1, 10)}.internal.corp"
-            ua = random.choice(user_agents)
-            http_req = build_http_request("GET", path, host, user_agent=ua)
-            
+            tpl = template_for((random.choice(paths), random.randrange(1, 10), random.choice(user_agents)))
+
             # Not a fully realistic TCP exchange; good enough for offline background noise.
-            tcp = build_tcp(http_req, src_ip, dst_ip, sport, dport, random.randrange(0, 2**32), 0, 0x18, 64240)
-            ip = build_ipv4(tcp, src_ip, dst_ip, proto=6, ident=random.randrange(0, 65536), ttl=random.choice([52, 64, 127]))
-            frames.append(Frame(now_us + random.randrange(0, 2_400_000), build_ether(ip, mac_src, mac_dst, 0x0800)))
+            frame = tpl.instance(
+                src_ip, dst_ip, sport, dport, random.randrange(0, 2**32),
+                ident=random.randrange(0, 65536), ttl=random.choice([52, 64, 127]),
+            )
+            ts_us = int(ts_all[k]) if timing else now_us + random.randrange(0, 2_400_000)
+            frames.append(Frame(ts_us, frame))
 
-    emit_background_noise(4500)
+    emit_background_noise(int(os.environ.get("NET02_NOISE_FRAMES", "4500")))
 
     def emit_http_flow(src_ip: str, dst_ip: str, sport: int, dport: int, requests: list[bytes]):
         nonlocal now_us
@@ -251,9 +609,17 @@ def main() -> None:
         seq_c += 1
         seq_s += 1
 
+        if timing:
+            # Request times for the whole flow in one call; the minimum gap keeps each response before the next request.
+            sched, process, window_s = timing
+            req_ts = sched.place_strict(len(requests), process, window_s, t0_us=now_us, min_gap_us=response_span_us + 5_000)
+
         # HTTP requests
-        for req in requests:
-            now_us += random.randrange(50_000, 200_000)  # Realistic timing between requests
+        for k, req in enumerate(requests):
+            if timing:
+                now_us = int(req_ts[k])
+            else:
+                now_us += random.randrange(50_000, 200_000)  # Realistic timing between requests
             seg = build_tcp(req, src_ip, dst_ip, sport, dport, seq_c, seq_s, flags=0x18, window=64240)
             seq_c = (seq_c + len(req)) & 0xFFFFFFFF
             ip = build_ipv4(seg, src_ip, dst_ip, proto=6, ident=random.randrange(0, 65536), ttl=64)
@@ -261,12 +627,52 @@ def main() -> None:
             
             # Server response (ACK)
             now_us += 5_000
+            if response_body is not None:
+                seq_s, t_end = emit_response_body(src_ip, dst_ip, sport, dport, seq_s, seq_c, now_us)
+                if not timing:
+                    now_us = t_end
+                continue
             resp_payload = b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n"
             resp_seg = build_tcp(resp_payload, dst_ip, src_ip, dport, sport, seq_s, seq_c, flags=0x18, window=64240)
             seq_s = (seq_s + len(resp_payload)) & 0xFFFFFFFF
             ip = build_ipv4(resp_seg, dst_ip, src_ip, proto=6, ident=random.randrange(0, 65536), ttl=64)
             frames.append(Frame(now_us, build_ether(ip, mac_dst, mac_src, 0x0800)))
 
+    def emit_response_body(src_ip: str, dst_ip: str, sport: int, dport: int, seq_s: int, seq_c: int, t_us: int) -> tuple[int, int]:
+        """
+        Queue one response for writing (see response_frames).
+        Returns (next server seq, time of the last frame).
+        """
+        nonlocal n_body_frames
+        # Own generator: the frames are built at write time, after the global draws are done.
+        rng = random.Random(random.getrandbits(64))
+        body_streams.append(response_frames(src_ip, dst_ip, sport, dport, seq_s, seq_c, t_us, rng))
+        n_body_frames += 1 + n_body_segs + (n_body_segs + 1) // 2
+        return (seq_s + len(response_head) + len(response_body)) & 0xFFFFFFFF, t_us + response_span_us - 5_000
+
+    def response_frames(src_ip: str, dst_ip: str, sport: int, dport: int, seq_s: int, seq_c: int, t_us: int, rng: random.Random):
+        """
+        Headers in one segment, then the shared body in MSS-sized segments that
+        reference it by memoryview; the client ACKs every second segment.
+        Yields (ts_us, data, payload) in time order.
+        """
+        seg = build_tcp(response_head, dst_ip, src_ip, dport, sport, seq_s, seq_c, flags=0x18, window=64240)
+        ip = build_ipv4(seg, dst_ip, src_ip, proto=6, ident=rng.randrange(0, 65536), ttl=64)
+        yield t_us, build_ether(ip, mac_dst, mac_src, 0x0800), b""
+        seq_s = (seq_s + len(response_head)) & 0xFFFFFFFF
+
+        for k, view in enumerate(segment_payload(response_body, mss)):
+            t_us += 120  # ~1460 B at 100 Mbit/s
+            flags = 0x18 if k == n_body_segs - 1 else 0x10
+            tcp_hdr = build_tcp_header(view, dst_ip, src_ip, dport, sport, seq_s, seq_c, flags, 64240)
+            ip_hdr = build_ipv4_header(len(tcp_hdr) + len(view), dst_ip, src_ip, proto=6, ident=rng.randrange(0, 65536), ttl=64)
+            yield t_us, build_ether(ip_hdr + tcp_hdr, mac_dst, mac_src, 0x0800), view
+            seq_s = (seq_s + len(view)) & 0xFFFFFFFF
+            if k % 2 == 1 or k == n_body_segs - 1:
+                ack = build_tcp(b"", src_ip, dst_ip, sport, dport, seq_c, seq_s, flags=0x10, window=64240)
+                ip = build_ipv4(ack, src_ip, dst_ip, proto=6, ident=rng.randrange(0, 65536), ttl=64)
+                yield t_us + 40, build_ether(ip, mac_src, mac_dst, 0x0800), b""
+
     # Build signal HTTP requests: encode Base64 chunks in User-Agent header
     # Real-world: User-Agent is commonly used because it's expected to vary
     signal_requests: list[bytes] = []
@@ -291,6 +697,9 @@ def main() -> None:
         signal_requests.append(build_http_request("GET", path, base_host, user_agent=ua))
 
     emit_http_flow(c_ip, s_ip, c_port, s_port, signal_requests)
+    if timing:
+        # Flows run concurrently across the window instead of back to back.
+        now_us = t0 * 1_000_000 + int(timing[0].rng.integers(0, 1_000_000))
 
     # Decoy flows: similar HTTP requests but without the exfiltration pattern
     for dip, sip, dp, sp in decoys:
@@ -304,21 +713,39 @@ def main() -> None:
             host = f"server{random.randrange(1, 5)}.internal.corp"
             decoy_requests.append(build_http_request("GET", path, host, user_agent=ua))
         emit_http_flow(dip, sip, dp, sp, decoy_requests)
-
-    # Sort by timestamp
-    frames.sort(key=lambda fr: fr.ts_us)
-    # Add micro-jitter
-    jittered: list[Frame] = []
-    for fr in frames:
-        jittered.append(Frame(fr.ts_us + random.randrange(0, 2_000), fr.data))
+        if timing:
+            now_us = t0 * 1_000_000 + int(timing[0].rng.integers(0, 1_000_000))
 
     out_pcap = os.path.join(out_dir, "net-02-doh-rhythm.pcap")
-    with open(out_pcap, "wb") as f:
-        f.write(PCAP_GLOBAL)
-        for fr in jittered:
-            ts_sec = fr.ts_us // 1_000_000
-            ts_usec = fr.ts_us % 1_000_000
-            f.write(pcap_pkt(int(ts_sec), int(ts_usec), fr.data))
+    # (ts_us, data, payload) in timestamp order: the sorted frames, then the response bodies merged in.
+    if isinstance(frames, SpillingFrameSorter):
+        ordered = ((ts_us, data, b"") for ts_us, data in frames.merged())
+    else:
+        frames.sort(key=lambda fr: fr.ts_us)
+        ordered = ((fr.ts_us, fr.data, b"") for fr in frames)
+    n_frames = len(frames)
+    if body_streams:
+        # heapq.merge takes the earlier iterable first on equal timestamps.
+        ordered = heapq.merge(ordered, *body_streams, key=itemgetter(0))
+        n_frames += n_body_frames
+    try:
+        with open(out_pcap, "wb") as f:
+            f.write(PCAP_GLOBAL)
+            jitter = None
+            for k, (ts_us, data, payload) in enumerate(ordered):
+                # Add micro-jitter; in timing mode drawn in 64k chunks (same values as one draw of n_frames).
+                if timing:
+                    if k % 65536 == 0:
+                        jitter = timing[0].rng.integers(0, 2_000, size=min(65536, n_frames - k))
+                    ts_us += int(jitter[k % 65536])
+                else:
+                    ts_us += random.randrange(0, 2_000)
+                f.write(pcap_pkt(ts_us // 1_000_000, ts_us % 1_000_000, data, len(payload)))
+                if payload:
+                    f.write(payload)
+    finally:
+        if isinstance(frames, SpillingFrameSorter):
+            frames.close()
 
     out_readme = os.path.join(out_dir, "README.txt")
     with open(out_readme, "w", encoding="utf-8") as f:
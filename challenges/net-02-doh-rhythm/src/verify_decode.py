@@ -4,46 +4,26 @@ Author-side verifier for NET-02.
 
 Decodes HTTP header exfiltration from challenge-files/net-02-doh-rhythm/net-02-doh-rhythm.pcap and prints recovered flag.
 Pure python, no deps.
+
+The capture can also come from stdin ('-') or a named pipe, e.g.
+`tcpdump -U -w - tcp port 80 | verify_decode.py -` or `zcat cap.pcap.gz | verify_decode.py -`.
+Packets are decoded as they arrive; only the exfil chunks are kept.
 """
 
 from __future__ import annotations
 
+import argparse
 import base64
 import os
 import re
+import stat
 import struct
 import sys
-from dataclasses import dataclass
-
-
-PCAP_GH_LEN = 24
-PCAP_PH_LEN = 16
-
-
-@dataclass
-class Pkt:
-    ts_us: int
-    data: bytes
-
+from typing import Iterable
 
-def read_pcap(pcap_path: str) -> list[Pkt]:
-    with open(pcap_path, "rb") as f:
-        gh = f.read(PCAP_GH_LEN)
-        if len(gh) != PCAP_GH_LEN:
-            raise ValueError("bad pcap")
-        pkts: list[Pkt] = []
-        while True:
-            ph = f.read(PCAP_PH_LEN)
-            if not ph:
-                break
-            if len(ph) != PCAP_PH_LEN:
-                raise ValueError("truncated packet header")
-            ts_sec, ts_usec, incl, _orig = struct.unpack("<IIII", ph)
-            data = f.read(incl)
-            if len(data) != incl:
-                raise ValueError("truncated packet data")
-            pkts.append(Pkt(ts_us=(ts_sec * 1_000_000 + ts_usec), data=data))
-        return pkts
+# Shared pcap helpers (tools/pcap/pcapio.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools", "pcap"))
+from pcapio import Pkt, iter_pcap_pkts, map_pcap_parallel  # noqa: E402
 
 
 def parse_ipv4_tcp(pkt: bytes):
@@ -87,40 +67,63 @@ def extract_http_user_agent(payload: bytes) -> str | None:
     return None
 
 
+# Signal flow tuple
+SIGNAL_FLOW = ("10.13.37.10", "10.13.37.80", 51022, 80)
+
+
+def extract_chunk(p: Pkt) -> str | None:
+    """Base64 chunk carried by one packet of the signal flow, if any."""
+    parsed = parse_ipv4_tcp(p.data)
+    if not parsed:
+        return None
+    src, dst, sport, dport, flags, payload = parsed
+    # Only client->server packets (PSH+ACK or just data)
+    if (src, dst, sport, dport) != SIGNAL_FLOW:
+        return None
+    if len(payload) < 10:  # Minimum HTTP request size
+        return None
+
+    # Extract User-Agent header
+    ua = extract_http_user_agent(payload)
+    if not ua:
+        return None
+
+    # Look for ExfilChunk pattern
+    match = re.search(r'ExfilChunk-([A-Za-z0-9_-]+)', ua)
+    return match.group(1) if match else None
+
+
+def extract_chunks(pkts: Iterable[Pkt]) -> list[str]:
+    return [chunk for chunk in map(extract_chunk, pkts) if chunk]
+
+
+def extract_chunks_parallel(pcap_path: str, jobs: int) -> list[str]:
+    """Same result as the sequential loop, parsed by `jobs` processes (tools/pcap/pcapio.py)."""
+    return map_pcap_parallel(pcap_path, extract_chunk, jobs)
+
+
 def main() -> None:
-    if len(sys.argv) > 1:
-        pcap_path = os.path.abspath(sys.argv[1])
+    ap = argparse.ArgumentParser(description="Decode the NET-02 User-Agent exfil channel")
+    ap.add_argument("pcap", nargs="?", help="capture to decode, '-' for stdin (default: challenge-files copy)")
+    ap.add_argument("-j", "--jobs", type=int, default=1, help="parse with N processes (large stress captures)")
+    args = ap.parse_args()
+    if args.pcap == "-":
+        pcap_path = "-"
+    elif args.pcap:
+        pcap_path = os.path.abspath(args.pcap)
     else:
         repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
         pcap_path = os.path.join(repo_root, "challenge-files", "net-02-doh-rhythm", "net-02-doh-rhythm.pcap")
-    pkts = read_pcap(pcap_path)
-
-    # Signal flow tuple
-    c_ip, s_ip, c_port, s_port = "10.13.37.10", "10.13.37.80", 51022, 80
 
     # Extract Base64 chunks from User-Agent headers
-    chunks: list[str] = []
-    for p in pkts:
-        parsed = parse_ipv4_tcp(p.data)
-        if not parsed:
-            continue
-        src, dst, sport, dport, flags, payload = parsed
-        # Only client->server packets (PSH+ACK or just data)
-        if not (src == c_ip and dst == s_ip and sport == c_port and dport == s_port):
-            continue
-        if len(payload) < 10:  # Minimum HTTP request size
-            continue
-        
-        # Extract User-Agent header
-        ua = extract_http_user_agent(payload)
-        if not ua:
-            continue
-        
-        # Look for ExfilChunk pattern
-        match = re.search(r'ExfilChunk-([A-Za-z0-9_-]+)', ua)
-        if match:
-            chunk = match.group(1)
-            chunks.append(chunk)
+    if pcap_path == "-":
+        chunks = extract_chunks(iter_pcap_pkts(sys.stdin.buffer))
+    elif args.jobs > 1 and stat.S_ISREG(os.stat(pcap_path).st_mode):
+        chunks = extract_chunks_parallel(pcap_path, args.jobs)
+    else:
+        # Sequential; also the path for named pipes (--jobs needs a seekable file).
+        with open(pcap_path, "rb") as f:
+            chunks = extract_chunks(iter_pcap_pkts(f))
 
     # Concatenate and decode Base64
     b64_string = "".join(chunks)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Closed-loop load generator for the Cerberus /analyze API.
+
+Each client process sends single-vector POSTs back to back (a new connection
+per request, like most probing scripts) for --seconds and records latencies.
+Rows are random by default so the prediction cache does not flatter the
+result; --repeat sends the same row every time.
+
+Prints requests/s, status counts and latency percentiles; --json for scripts.
+Pure python, no deps.
+
+Usage:
+  python3 tools/cerberus/loadtest.py http://127.0.0.1:5000 --clients 16 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import multiprocessing as mp
+import random
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+def _client(host: str, port: int, path: str, seconds: float, seed: int, repeat: bool, batch: int, q) -> None:
+    rnd = random.Random(seed)
+    fixed = [rnd.uniform(-2, 2) for _ in range(20)]
+    codes: Counter = Counter()
+    latencies: list[float] = []
+    end = time.time() + seconds
+    while time.time() < end:
+        rows = [fixed if repeat else [rnd.uniform(-2, 2) for _ in range(20)] for _ in range(batch)]
+        body = json.dumps({"features": rows[0] if batch == 1 else rows})
+        t = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            conn.request("POST", path, body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            conn.close()
+            codes[resp.status] += 1
+        except OSError:
+            codes["error"] += 1
+            continue
+        latencies.append(time.perf_counter() - t)
+    q.put((dict(codes), latencies))
+
+
+def _pct(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def run_load(url: str, clients: int, seconds: float, repeat: bool = False, batch: int = 1) -> dict:
+    parts = urlsplit(url)
+    path = parts.path if parts.path not in ("", "/") else "/analyze"
+    q: mp.Queue = mp.Queue()
+    procs = [
+        mp.Process(target=_client, args=(parts.hostname, parts.port or 80, path, seconds, i, repeat, batch, q))
+        for i in range(clients)
+    ]
+    for p in procs:
+        p.start()
+    results = [q.get() for _ in procs]
+    for p in procs:
+        p.join()
+    codes: Counter = Counter()
+    latencies: list[float] = []
+    for c, lat in results:
+        codes.update(c)
+        latencies.extend(lat)
+    latencies.sort()
+    ok = codes.get(200, 0)
+    return {
+        "clients": clients,
+        "seconds": seconds,
+        "requests": sum(codes.values()),
+        "status": {str(k): v for k, v in sorted(codes.items(), key=str)},
+        "ok_per_s": round(ok / seconds, 1),
+        "rows_per_s": round(ok * batch / seconds, 1),
+        "p50_ms": round(_pct(latencies, 0.50) * 1e3, 2),
+        "p90_ms": round(_pct(latencies, 0.90) * 1e3, 2),
+        "p99_ms": round(_pct(latencies, 0.99) * 1e3, 2),
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Load-test the Cerberus /analyze endpoint")
+    ap.add_argument("url", help="server base URL (path defaults to /analyze)")
+    ap.add_argument("--clients", type=int, default=8, help="concurrent client processes")
+    ap.add_argument("--seconds", type=float, default=10.0, help="test duration")
+    ap.add_argument("--repeat", action="store_true", help="send the same row every time (cache hits)")
+    ap.add_argument("--batch", type=int, default=1, help="rows per request (batch form when > 1)")
+    ap.add_argument("--json", action="store_true", help="print JSON")
+    args = ap.parse_args()
+
+    st = run_load(args.url, args.clients, args.seconds, args.repeat, args.batch)
+    if args.json:
+        json.dump(st, sys.stdout, indent=2)
+        print()
+    else:
+        print(
+            f"{st['clients']} clients, {st['seconds']:.0f} s: {st['ok_per_s']:.0f} req/s ok, {st['rows_per_s']:.0f} rows/s, "
+            f"p50 {st['p50_ms']} ms, p90 {st['p90_ms']} ms, p99 {st['p99_ms']} ms, status {st['status']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
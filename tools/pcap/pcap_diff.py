@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Determinism diff between two captures (e.g. two generator runs with the same
+seed and key).
+
+Ordered mode streams both files side by side and compares a BLAKE2b digest of
+every record (header fields + frame); memory stays constant. It stops after
+the first N divergences and prints the decoded layers of both sides.
+
+--unordered compares the packet multisets instead (needed for NET-01, whose
+frames are shuffled): one pass per file collecting digest counts, then a
+second pass to show the packets that only one side has.
+
+--ignore-ts leaves timestamps out of the digest (the generators stamp frames
+relative to time.time()).
+
+Exit status: 0 identical, 1 different. Pure python, no deps.
+
+Usage:
+  python3 tools/pcap/pcap_diff.py a.pcap b.pcap [-n 5] [--unordered] [--ignore-ts]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import struct
+from collections import Counter
+from itertools import zip_longest
+
+from pcapio import PcapReader, ip_str, parse_dns_name
+
+
+def record_digest(reader: PcapReader, ph: bytes, data: bytes, ignore_ts: bool) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    if not ignore_ts:
+        h.update(struct.pack("<Q", reader.ts_us(ph)))
+    h.update(struct.pack("<I", len(data)))
+    h.update(data)
+    return h.digest()
+
+
+def describe_frame(fr: bytes) -> list[str]:
+    """Human-readable layer summary of an Ethernet frame."""
+    out = []
+    if len(fr) < 14:
+        return [f"short frame ({len(fr)} B)"]
+    ethertype = struct.unpack("!H", fr[12:14])[0]
+    out.append(f"Ether {fr[6:12].hex(':')} -> {fr[0:6].hex(':')} type=0x{ethertype:04x}")
+    if ethertype != 0x0800 or len(fr) < 34:
+        return out
+    ihl = (fr[14] & 0x0F) * 4
+    total_len, ident = struct.unpack("!HH", fr[16:20])
+    ttl, proto, csum = fr[22], fr[23], struct.unpack("!H", fr[24:26])[0]
+    out.append(
+        f"IPv4 {ip_str(fr[26:30])} -> {ip_str(fr[30:34])} proto={proto} ttl={ttl} id={ident} len={total_len} csum=0x{csum:04x}"
+    )
+    l4 = 14 + ihl
+    if proto == 17 and len(fr) >= l4 + 8:
+        sport, dport, ulen, ucsum = struct.unpack("!HHHH", fr[l4:l4 + 8])
+        out.append(f"UDP {sport} -> {dport} len={ulen} csum=0x{ucsum:04x}")
+        dns = fr[l4 + 8:]
+        if 53 in (sport, dport) and len(dns) >= 12:
+            txid, flags, qd, an = struct.unpack("!HHHH", dns[:8])
+            qname, _ = parse_dns_name(dns, 12)
+            kind = "response" if flags & 0x8000 else "query"
+            out.append(f"DNS {kind} id=0x{txid:04x} qd={qd} an={an} qname={qname}")
+    elif proto == 6 and len(fr) >= l4 + 20:
+        sport, dport, seq, ack, off_flags, win, tcsum = struct.unpack("!HHIIHHH", fr[l4:l4 + 18])
+        out.append(
+            f"TCP {sport} -> {dport} seq={seq} ack={ack} flags=0x{off_flags & 0x1FF:03x} win={win} csum=0x{tcsum:04x}"
+        )
+        payload = fr[l4 + (off_flags >> 12) * 4:]
+        if payload:
+            lines = payload.split(b"\r\n")
+            first = lines[0][:80].decode("latin-1")
+            ua = next((ln for ln in lines if ln.lower().startswith(b"user-agent:")), b"")
+            out.append(f"Payload {len(payload)} B: {first!r}" + (f" {ua.decode('latin-1')!r}" if ua else ""))
+    return out
+
+
+def print_side(label: str, reader: PcapReader, rec: tuple[bytes, bytes] | None) -> None:
+    if rec is None:
+        print(f"  {label}: <end of capture>")
+        return
+    ph, data = rec
+    print(f"  {label}: ts_us={reader.ts_us(ph)} caplen={len(data)}")
+    for layer in describe_frame(data):
+        print(f"      {layer}")
+
+
+def diff_ordered(path_a: str, path_b: str, limit: int, ignore_ts: bool) -> int:
+    found = 0
+    idx = -1
+    with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+        ra, rb = PcapReader(fa), PcapReader(fb)
+        for idx, (rec_a, rec_b) in enumerate(zip_longest(ra.records(), rb.records())):
+            da = record_digest(ra, *rec_a, ignore_ts) if rec_a else None
+            db = record_digest(rb, *rec_b, ignore_ts) if rec_b else None
+            if da == db:
+                continue
+            found += 1
+            print(f"#{idx}: packets differ")
+            print_side("A", ra, rec_a)
+            print_side("B", rb, rec_b)
+            if found >= limit:
+                print(f"(stopped after {limit} divergences)")
+                return found
+    print(f"{idx + 1} packets compared, {found} divergences")
+    return found
+
+
+def _digest_counts(path: str, ignore_ts: bool) -> Counter:
+    with open(path, "rb") as f:
+        r = PcapReader(f)
+        return Counter(record_digest(r, ph, data, ignore_ts) for ph, data in r.records())
+
+
+def _show_extra(path: str, label: str, extra: Counter, limit: int, ignore_ts: bool) -> None:
+    left = Counter(extra)
+    shown = 0
+    with open(path, "rb") as f:
+        r = PcapReader(f)
+        for idx, (ph, data) in enumerate(r.records()):
+            d = record_digest(r, ph, data, ignore_ts)
+            if left[d] > 0:
+                left[d] -= 1
+                print(f"#{idx} only in {label}:")
+                print_side(label, r, (ph, data))
+                shown += 1
+                if shown >= limit:
+                    return
+
+
+def diff_unordered(path_a: str, path_b: str, limit: int, ignore_ts: bool) -> int:
+    ca = _digest_counts(path_a, ignore_ts)
+    cb = _digest_counts(path_b, ignore_ts)
+    only_a, only_b = ca - cb, cb - ca
+    n_a, n_b = sum(only_a.values()), sum(only_b.values())
+    if n_a:
+        _show_extra(path_a, "A", only_a, limit, ignore_ts)
+    if n_b:
+        _show_extra(path_b, "B", only_b, limit, ignore_ts)
+    print(f"{sum(ca.values())} vs {sum(cb.values())} packets, {n_a} only in A, {n_b} only in B")
+    return n_a + n_b
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compare two captures packet by packet")
+    ap.add_argument("a", help="first capture")
+    ap.add_argument("b", help="second capture")
+    ap.add_argument("-n", "--limit", type=int, default=5, help="stop after / show at most N divergences")
+    ap.add_argument("--unordered", action="store_true", help="compare packet multisets (ignore order)")
+    ap.add_argument("--ignore-ts", action="store_true", help="leave timestamps out of the comparison")
+    args = ap.parse_args()
+
+    if args.unordered:
+        diffs = diff_unordered(args.a, args.b, args.limit, args.ignore_ts)
+    else:
+        diffs = diff_ordered(args.a, args.b, args.limit, args.ignore_ts)
+    return 1 if diffs else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Shared pcap helpers for the author-side capture tools (NET-01 / NET-02).
+
+Streaming reader/writer for classic libpcap files plus a tiny Ethernet/IPv4
+flow parser. Pure python, no deps (the array helpers used by the bulk
+generator paths take NumPy arrays and import numpy when called).
+"""
+
+from __future__ import annotations
+
+import gzip
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from multiprocessing import Pool
+from typing import Any, BinaryIO, Callable, Iterator
+
+
+PCAP_GH_LEN = 24
+PCAP_PH_LEN = 16
+
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+
+# First bytes of a stream -> (byte order, nanosecond timestamps)
+PCAP_MAGICS = {
+    b"\xd4\xc3\xb2\xa1": ("<", False),
+    b"\xa1\xb2\xc3\xd4": (">", False),
+    b"\x4d\x3c\xb2\xa1": ("<", True),
+    b"\xa1\xb2\x3c\x4d": (">", True),
+}
+GZIP_MAGIC = b"\x1f\x8b"
+PCAPNG_MAGIC = b"\x0a\x0d\x0d\x0a"
+# Records larger than this (and the snaplen) mean the stream is not a pcap.
+MAX_RECORD = 256 * 1024
+
+
+@dataclass
+class Pkt:
+    ts_us: int
+    data: bytes
+
+
+@dataclass(frozen=True)
+class PcapHeader:
+    endian: str  # "<" or ">"
+    nanos: bool
+    snaplen: int
+    linktype: int
+    raw: bytes
+
+
+def parse_global_header(gh: bytes) -> PcapHeader:
+    if len(gh) != PCAP_GH_LEN:
+        raise ValueError("bad pcap")
+    for endian in ("<", ">"):
+        magic = struct.unpack(endian + "I", gh[:4])[0]
+        if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            _major, _minor, _tz, _sigfigs, snaplen, linktype = struct.unpack(endian + "HHiIII", gh[4:])
+            return PcapHeader(endian, magic == PCAP_MAGIC_NS, snaplen, linktype, gh)
+    raise ValueError("bad pcap magic")
+
+
+class PcapReader:
+    """
+    Streams records from an open binary file without reading it whole.
+    Iterating yields Pkt; records() yields the raw (header, data) pairs so tools
+    can copy packets verbatim.
+    """
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.header = parse_global_header(f.read(PCAP_GH_LEN))
+        self._ph = struct.Struct(self.header.endian + "IIII")
+
+    def records(self) -> Iterator[tuple[bytes, bytes]]:
+        f = self.f
+        while True:
+            ph = f.read(PCAP_PH_LEN)
+            if not ph:
+                return
+            if len(ph) != PCAP_PH_LEN:
+                raise ValueError("truncated packet header")
+            incl = self._ph.unpack(ph)[2]
+            data = f.read(incl)
+            if len(data) != incl:
+                raise ValueError("truncated packet data")
+            yield ph, data
+
+    def ts_us(self, ph: bytes) -> int:
+        ts_sec, ts_frac, _incl, _orig = self._ph.unpack(ph)
+        if self.header.nanos:
+            ts_frac //= 1000
+        return ts_sec * 1_000_000 + ts_frac
+
+    def __iter__(self) -> Iterator[Pkt]:
+        for ph, data in self.records():
+            yield Pkt(ts_us=self.ts_us(ph), data=data)
+
+
+def iter_mmap_records(buf, hdr: PcapHeader, start: int = PCAP_GH_LEN) -> Iterator[tuple[int, int, int]]:
+    """
+    (ts_us, data_offset, caplen) for every record of an mmap'd/bytes capture.
+    The iterator copies nothing; callers should read fields in place
+    (struct.unpack_from, indexing), since every slice of an mmap is a new
+    bytes object.
+    """
+    unpack = struct.Struct(hdr.endian + "IIII").unpack_from
+    size = len(buf)
+    nanos = hdr.nanos
+    pos = start
+    while pos < size:
+        if pos + PCAP_PH_LEN > size:
+            raise ValueError("truncated packet header")
+        ts_sec, ts_frac, incl, _orig = unpack(buf, pos)
+        pos += PCAP_PH_LEN
+        if pos + incl > size:
+            raise ValueError("truncated packet data")
+        yield ts_sec * 1_000_000 + (ts_frac // 1000 if nanos else ts_frac), pos, incl
+        pos += incl
+
+
+def read_pcap(pcap_path: str) -> list[Pkt]:
+    with open(pcap_path, "rb") as f:
+        return list(PcapReader(f))
+
+
+class _Replay:
+    """Readable view of a stream that first returns the bytes already consumed for format detection."""
+
+    def __init__(self, head: bytes, f: BinaryIO):
+        self.head = head
+        self.f = f
+
+    def read(self, n: int = -1) -> bytes:
+        if not self.head:
+            return self.f.read(n)
+        if n < 0:
+            out, self.head = self.head + self.f.read(), b""
+            return out
+        out, self.head = self.head[:n], self.head[n:]
+        return out
+
+
+def iter_pcap_pkts(f: BinaryIO) -> Iterator[Pkt]:
+    """
+    Streams records from a file, pipe or stdin, one record in memory at a time.
+    Unlike PcapReader, the format is detected from the first bytes: classic
+    pcap in either byte order with us or ns timestamps, optionally
+    gzip-compressed, and record lengths are sanity-checked.
+    """
+    head = f.read(4)
+    if head[:2] == GZIP_MAGIC:
+        yield from iter_pcap_pkts(gzip.GzipFile(fileobj=_Replay(head, f), mode="rb"))
+        return
+    if head == PCAPNG_MAGIC:
+        raise ValueError("pcapng capture; convert it with `editcap -F pcap` (or capture with `tcpdump -w -`)")
+    if head not in PCAP_MAGICS:
+        raise ValueError("bad pcap magic")
+    endian, nanos = PCAP_MAGICS[head]
+    gh = f.read(PCAP_GH_LEN - 4)
+    if len(gh) != PCAP_GH_LEN - 4:
+        raise ValueError("bad pcap")
+    limit = max(struct.unpack(endian + "I", gh[12:16])[0], MAX_RECORD)
+    unpack = struct.Struct(endian + "IIII").unpack
+    while True:
+        ph = f.read(PCAP_PH_LEN)
+        if not ph:
+            break
+        if len(ph) != PCAP_PH_LEN:
+            raise ValueError("truncated packet header")
+        ts_sec, ts_frac, incl, _orig = unpack(ph)
+        if incl > limit:
+            raise ValueError(f"implausible record length {incl}")
+        data = f.read(incl)
+        if len(data) != incl:
+            raise ValueError("truncated packet data")
+        yield Pkt(ts_us=ts_sec * 1_000_000 + (ts_frac // 1000 if nanos else ts_frac), data=data)
+
+
+# --- Parallel parsing -------------------------------------------------------
+#
+# The file is cut into byte ranges. A worker that does not start at the first
+# record has to find a record boundary itself: it scans for an offset where a
+# short chain of record headers all look plausible (caplen <= snaplen,
+# caplen <= origlen, sub-second field in range, timestamps close together,
+# records inside the file). Every worker then parses the records that *start*
+# inside its range and reports where its chain stepped past the range end.
+#
+# The merge walks the ranges in order and checks that each worker started
+# exactly where the previous chain ended. A range whose heuristic guessed wrong
+# (or which failed) is re-parsed in the parent from the known-good offset, so
+# the result is always identical to a sequential parse.
+
+RESYNC_DEPTH = 8
+RESYNC_MAX_SKEW_S = 3600
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+
+def _chain_plausible(buf, pos: int, hdr: PcapHeader, depth: int) -> bool:
+    size = len(buf)
+    unpack = struct.Struct(hdr.endian + "IIII").unpack_from
+    frac_max = 1_000_000_000 if hdr.nanos else 1_000_000
+    first_sec = None
+    for _ in range(depth):
+        if pos == size:
+            return True
+        if pos + PCAP_PH_LEN > size:
+            return False
+        ts_sec, ts_frac, incl, orig = unpack(buf, pos)
+        if ts_frac >= frac_max or incl > hdr.snaplen or incl > orig:
+            return False
+        if first_sec is None:
+            first_sec = ts_sec
+        elif abs(ts_sec - first_sec) > RESYNC_MAX_SKEW_S:
+            return False
+        pos += PCAP_PH_LEN + incl
+        if pos > size:
+            return False
+    return True
+
+
+def find_record_boundary(buf, start: int, stop: int, hdr: PcapHeader, depth: int = RESYNC_DEPTH) -> int | None:
+    """First offset in [start, stop) where a plausible record chain begins."""
+    for pos in range(start, min(stop, len(buf))):
+        if _chain_plausible(buf, pos, hdr, depth):
+            return pos
+    return None
+
+
+def _parse_span(buf, pos: int, stop: int, hdr: PcapHeader, fn) -> tuple[list[Any], int]:
+    """Parse records starting at pos until a record starts at or after stop. Returns (results, next_pos)."""
+    unpack = struct.Struct(hdr.endian + "IIII").unpack_from
+    size = len(buf)
+    out: list[Any] = []
+    while pos < stop and pos < size:
+        if pos + PCAP_PH_LEN > size:
+            raise ValueError("truncated packet header")
+        ts_sec, ts_frac, incl, _orig = unpack(buf, pos)
+        a = pos + PCAP_PH_LEN
+        if a + incl > size:
+            raise ValueError("truncated packet data")
+        if hdr.nanos:
+            ts_frac //= 1000
+        pkt = Pkt(ts_us=ts_sec * 1_000_000 + ts_frac, data=buf[a:a + incl])
+        r = fn(pkt) if fn is not None else pkt
+        if r is not None:
+            out.append(r)
+        pos = a + incl
+    return out, pos
+
+
+def _parse_range(job: tuple[str, int, int, PcapHeader, Callable | None]):
+    path, start, stop, hdr, fn = job
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            boundary = start if start == PCAP_GH_LEN else find_record_boundary(mm, start, stop, hdr)
+            if boundary is None:
+                return None, stop, []
+            results, next_pos = _parse_span(mm, boundary, stop, hdr, fn)
+            return boundary, next_pos, results
+    except ValueError:
+        return -1, -1, []
+
+
+def map_pcap_parallel(pcap_path: str, fn: Callable[[Pkt], Any] | None = None, jobs: int | None = None) -> list[Any]:
+    """
+    Apply fn to every packet using `jobs` processes and return the non-None
+    results in file order (all Pkts when fn is None). fn must be picklable
+    (a module-level function). Small files are parsed in-process.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    size = os.path.getsize(pcap_path)
+    with open(pcap_path, "rb") as f:
+        hdr = parse_global_header(f.read(PCAP_GH_LEN))
+    if jobs <= 1 or size < PARALLEL_MIN_BYTES:
+        with open(pcap_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _parse_span(mm, PCAP_GH_LEN, size, hdr, fn)[0]
+
+    # A few ranges per worker evens out uneven packet mixes.
+    n_ranges = jobs * 4
+    step = -(-(size - PCAP_GH_LEN) // n_ranges)
+    bounds = [(PCAP_GH_LEN + i * step, min(size, PCAP_GH_LEN + (i + 1) * step)) for i in range(n_ranges)]
+    bounds = [(a, b) for a, b in bounds if a < b]
+
+    out: list[Any] = []
+    expected = PCAP_GH_LEN
+    with Pool(jobs) as pool, open(pcap_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        jobs_iter = ((pcap_path, a, b, hdr, fn) for a, b in bounds)
+        for (_start, stop), (boundary, next_pos, results) in zip(bounds, pool.imap(_parse_range, jobs_iter)):
+            if expected >= stop:
+                # A record from an earlier range spans this whole range.
+                continue
+            if boundary != expected:
+                results, next_pos = _parse_span(mm, expected, stop, hdr, fn)
+            out.extend(results)
+            expected = next_pos
+    return out
+
+
+def read_pcap_parallel(pcap_path: str, jobs: int | None = None) -> list[Pkt]:
+    return map_pcap_parallel(pcap_path, None, jobs)
+
+
+# --- Checksums ----------------------------------------------------------------
+
+
+def ones_complement_sum(data) -> int:
+    """
+    16-bit ones' complement sum of a bytes-like object (odd length zero-padded).
+    2**16 == 1 (mod 0xFFFF), so the folded word sum is the big-endian integer
+    value mod 0xFFFF (0xFFFF unless all zero); no per-word loop.
+    """
+    n = int.from_bytes(data, "big")
+    if len(data) % 2:
+        n <<= 8
+    if n == 0:
+        return 0
+    return n % 0xFFFF or 0xFFFF
+
+
+def internet_checksum(*parts) -> int:
+    """RFC 1071 checksum over the concatenation of parts; every part but the last must have even length."""
+    s = sum(ones_complement_sum(p) for p in parts)
+    return ~(s % 0xFFFF or (0xFFFF if s else 0)) & 0xFFFF
+
+
+def checksum_update(csum: int, old_sum: int, new_sum: int) -> int:
+    """
+    Incremental checksum update (RFC 1624, eqn. 3): HC' = ~(~HC + ~m + m').
+    old_sum/new_sum are the sums of the 16-bit words that changed; they need not
+    be folded (a 32-bit field can be passed as one int), only their value mod
+    0xFFFF matters.
+    """
+    s = (~csum & 0xFFFF) + (~(old_sum % 0xFFFF) & 0xFFFF) + new_sum
+    return ~(s % 0xFFFF or 0xFFFF) & 0xFFFF
+
+
+def checksum_update_array(csum: int, old_sum: int, new_sum):
+    """checksum_update() for a NumPy int64 array of new sums (needs numpy)."""
+    import numpy as np
+
+    s = (~csum & 0xFFFF) + (~(old_sum % 0xFFFF) & 0xFFFF) + new_sum
+    s %= 0xFFFF
+    return ~np.where(s == 0, 0xFFFF, s) & 0xFFFF
+
+
+def put_be(rows, off: int, values, width: int) -> None:
+    """Store values big-endian at bytes off..off+width of every row of a uint8 frame array (NumPy)."""
+    rows[:, off:off + width] = values.astype(f">u{width}").view("u1").reshape(-1, width)
+
+
+def pcap_global(snaplen: int = 65535, linktype: int = 1) -> bytes:
+    return struct.pack("<IHHIIII", PCAP_MAGIC_US, 2, 4, 0, 0, snaplen, linktype)
+
+
+def pcap_pkt(ts_us: int, frame: bytes) -> bytes:
+    incl = len(frame)
+    return struct.pack("<IIII", ts_us // 1_000_000, ts_us % 1_000_000, incl, incl) + frame
+
+
+def ip_str(b: bytes) -> str:
+    return ".".join(str(x) for x in b)
+
+
+def parse_flow(fr: bytes) -> tuple[str, str, int, int, int] | None:
+    """(src, dst, sport, dport, proto) for Ethernet/IPv4 frames, else None. Ports are 0 for non TCP/UDP."""
+    if len(fr) < 14 + 20:
+        return None
+    if fr[12] != 0x08 or fr[13] != 0x00:
+        return None
+    ver_ihl = fr[14]
+    if (ver_ihl >> 4) != 4:
+        return None
+    ihl = (ver_ihl & 0x0F) * 4
+    proto = fr[14 + 9]
+    src = ip_str(fr[26:30])
+    dst = ip_str(fr[30:34])
+    sport = dport = 0
+    l4 = 14 + ihl
+    if proto in (6, 17) and len(fr) >= l4 + 4:
+        sport, dport = struct.unpack_from("!HH", fr, l4)
+    return src, dst, sport, dport, proto
+
+
+def parse_dns_name(msg: bytes, offset: int) -> tuple[str, int]:
+    """Name at offset of a DNS message (follows compression pointers). Returns (name, offset after it)."""
+    labels: list[str] = []
+    pos = offset
+    end = None
+    for _ in range(64):
+        if pos >= len(msg):
+            break
+        length = msg[pos]
+        if length == 0:
+            pos += 1
+            break
+        if (length & 0xC0) == 0xC0:
+            if pos + 1 >= len(msg):
+                break
+            if end is None:
+                end = pos + 2
+            pos = ((length & 0x3F) << 8) | msg[pos + 1]
+            continue
+        if length > 63 or pos + 1 + length > len(msg):
+            break
+        labels.append(msg[pos + 1:pos + 1 + length].decode("ascii", errors="replace"))
+        pos += 1 + length
+    return ".".join(labels), (end if end is not None else pos)
+
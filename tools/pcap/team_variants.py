@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Per-team variants of a NET-01 / NET-02 capture by rewriting one base capture
+instead of rerunning the generator for every key.
+
+The base capture is parsed once into a patch plan: the records that carry exfil
+chunks (NET-01: first label of <chunk>.blueprint.professor.royalmint.local in
+queries and responses; NET-02: the ExfilChunk-<chunk> User-Agent of the signal
+flow), every record of a TCP flow that carries chunks (its seq/ack numbers move
+when a chunk changes length), and every record touching a remapped address.
+The base message is decoded from the chunks themselves, so only the KEY line is
+swapped for the team's key; the flag and chunk size come from the capture.
+
+Each variant is then written from the mmap'd base: untouched byte ranges are
+copied as-is, planned records are patched in a bytearray. Checksums are updated
+incrementally (RFC 1624) for same-length edits (IP/port remaps, seq/ack shifts,
+same-length chunks); lengths (IPv4 total length, UDP length, pcap caplen) are
+adjusted when a chunk changes length, DNS compression pointers behind the
+chunk label are shifted, and only then is the L4 checksum summed again.
+
+Team keys of the base key's length (the 64-hex keys from startup.sh) give the
+same chunk layout; the chunk count must match the base either way. Captures
+match what the generator writes for that key, byte for byte.
+
+Pure python, no deps.
+
+Usage:
+  python3 tools/pcap/team_variants.py base.pcap --challenge net-01 --teams teams.json -o out/
+  python3 tools/pcap/team_variants.py base.pcap --challenge net-02 --key <team key> \\
+      [--ip 10.13.37.10=10.13.99.10] [--port 10.13.37.10:51022=40000] -o team.pcap
+
+teams.json: [{"name": "team01", "key": "...", "ip": {"10.0.5.42": "10.0.7.42"}, "port": {"10.0.5.42:54321": 50000}}, ...]
+("ip" and "port" are optional and extend the --ip/--port maps given on the command line).
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+
+from pcapio import (
+    PCAP_GH_LEN,
+    PCAP_PH_LEN,
+    checksum_update,
+    internet_checksum,
+    iter_mmap_records,
+    ones_complement_sum,
+    parse_dns_name,
+    parse_global_header,
+)
+
+
+NET01_EXFIL_SUFFIX = "blueprint.professor.royalmint.local"
+NET01_IDENT_BASE = 1000
+NET02_CHUNK_TAG = b"ExfilChunk-"
+
+CHALLENGES = ("net-01", "net-02")
+
+
+@dataclass
+class RecordPlan:
+    pos: int  # offset of the record header in the base capture
+    caplen: int
+    l4: int  # frame offset of the TCP/UDP header
+    proto: int
+    # (frame offset, length, chunk index) of every exfil chunk in the frame.
+    chunks: list[tuple[int, int, int]] = field(default_factory=list)
+    dns: int | None = None  # frame offset of the DNS message (chunk-bearing DNS only)
+    # Frame offsets of DNS compression pointers (fixed when the chunk label changes length).
+    pointers: list[int] = field(default_factory=list)
+    tcp_flow: tuple | None = None  # (src, dst, sport, dport) when part of a chunk-bearing TCP flow
+
+
+@dataclass
+class BasePlan:
+    hdr: object
+    records: list[RecordPlan]
+    chunks: list[str]  # base exfil chunks, in message order
+
+    def message(self) -> str:
+        b64 = "".join(self.chunks)
+        return base64.urlsafe_b64decode(b64 + "=" * (-len(b64) % 4)).decode("utf-8")
+
+
+def _ipv4_l4(mm, a: int, incl: int):
+    """(ihl end / L4 offset, proto, src, dst) for Ethernet/IPv4 frames, else None."""
+    if incl < 34 or mm[a + 12] != 0x08 or mm[a + 13] != 0x00 or (mm[a + 14] >> 4) != 4:
+        return None
+    return 14 + (mm[a + 14] & 0x0F) * 4, mm[a + 23], bytes(mm[a + 26:a + 30]), bytes(mm[a + 30:a + 34])
+
+
+def _dns_pointer_fields(msg: bytes, dns: int) -> list[int]:
+    """Frame offsets of all compression pointers in a DNS message's question and answer names."""
+    out: list[int] = []
+
+    def walk(pos: int) -> int:
+        while pos < len(msg):
+            length = msg[pos]
+            if length == 0:
+                return pos + 1
+            if (length & 0xC0) == 0xC0:
+                out.append(dns + pos)
+                return pos + 2
+            pos += 1 + length
+        return pos
+
+    qd, an, ns, ar = struct.unpack_from("!HHHH", msg, 4)
+    pos = 12
+    for _ in range(qd):
+        pos = walk(pos) + 4
+    for _ in range(an + ns + ar):
+        pos = walk(pos)
+        rtype, _cls, _ttl, rdlen = struct.unpack_from("!HHIH", msg, pos)
+        pos += 10
+        if rtype in (2, 5, 12):  # NS, CNAME, PTR: RDATA is a name
+            walk(pos)
+        pos += rdlen
+    return out
+
+
+def _net01_chunk(mm, a: int, incl: int, l4: int):
+    """(chunk, DNS offset, is_query, IP ident, txid, DNS message) for NET-01 exfil queries/responses, else None."""
+    if incl < l4 + 8 + 12:
+        return None
+    sport, dport = struct.unpack_from("!HH", mm, a + l4)
+    if 53 not in (sport, dport):
+        return None
+    dns = l4 + 8
+    msg = bytes(mm[a + dns:a + incl])
+    qname, _ = parse_dns_name(msg, 12)
+    head, _, tail = qname.partition(".")
+    if tail != NET01_EXFIL_SUFFIX or not head:
+        return None
+    txid, flags = struct.unpack_from("!HH", msg, 0)
+    ident = struct.unpack_from("!H", mm, a + 18)[0]
+    return head, dns, not (flags & 0x8000), ident, txid, msg
+
+
+def build_plan(path: str, challenge: str, addresses: set[bytes]) -> BasePlan:
+    """One pass (two for NET-02) over the base capture; addresses are IPs any variant remaps."""
+    if challenge not in CHALLENGES:
+        raise ValueError(f"challenge must be one of {', '.join(CHALLENGES)}")
+    records: list[RecordPlan] = []
+    by_index: dict[int, str] = {}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        hdr = parse_global_header(mm[:PCAP_GH_LEN])
+
+        tcp_flows: set[tuple] = set()
+        if challenge == "net-02":
+            # First pass: the TCP flows that carry chunks (every record of them may need a seq/ack shift).
+            for _ts, a, incl in iter_mmap_records(mm, hdr):
+                ip = _ipv4_l4(mm, a, incl)
+                if ip and ip[1] == 6 and mm.find(NET02_CHUNK_TAG, a, a + incl) >= 0:
+                    l4, _p, src, dst = ip
+                    sport, dport = struct.unpack_from("!HH", mm, a + l4)
+                    tcp_flows.add((src, dst, sport, dport))
+                    tcp_flows.add((dst, src, dport, sport))
+
+        txid_index: dict[int, list[int]] = {}
+        responses: list[tuple[RecordPlan, int, str]] = []
+        n_sites = 0
+        for _ts, a, incl in iter_mmap_records(mm, hdr):
+            ip = _ipv4_l4(mm, a, incl)
+            if ip is None:
+                continue
+            l4, proto, src, dst = ip
+            rp = RecordPlan(a - PCAP_PH_LEN, incl, l4, proto)
+
+            if challenge == "net-01" and proto == 17:
+                hit = _net01_chunk(mm, a, incl, l4)
+                if hit:
+                    head, dns, is_query, ident, txid, msg = hit
+                    rp.dns = dns
+                    rp.pointers = _dns_pointer_fields(msg, dns)
+                    if is_query:
+                        index = ident - NET01_IDENT_BASE
+                        by_index[index] = head
+                        txid_index.setdefault(txid, []).append(index)
+                        rp.chunks.append((dns + 13, len(head), index))
+                    else:
+                        responses.append((rp, txid, head))
+            elif challenge == "net-02" and proto == 6:
+                sport, dport = struct.unpack_from("!HH", mm, a + l4)
+                flow = (src, dst, sport, dport)
+                if flow in tcp_flows:
+                    rp.tcp_flow = flow
+                    payload = l4 + (mm[a + l4 + 12] >> 4) * 4
+                    tag = mm.find(NET02_CHUNK_TAG, a + payload, a + incl)
+                    if tag >= 0:
+                        start = tag + len(NET02_CHUNK_TAG)
+                        end = mm.find(b")", start, a + incl)
+                        if end < 0:
+                            raise ValueError("unterminated ExfilChunk header")
+                        by_index[n_sites] = mm[start:end].decode("ascii")
+                        rp.chunks.append((start - a, end - start, n_sites))
+                        n_sites += 1
+
+            if rp.chunks or rp.tcp_flow or rp.dns is not None or src in addresses or dst in addresses:
+                records.append(rp)
+
+        for rp, txid, head in responses:
+            index = next((i for i in txid_index.get(txid, []) if by_index[i] == head), None)
+            if index is None:
+                raise ValueError(f"DNS response for chunk {head!r} does not match any exfil query")
+            rp.chunks.append((rp.dns + 13, len(head), index))
+
+    if not by_index:
+        raise ValueError(f"no {challenge} exfil chunks found in {path}")
+    if sorted(by_index) != list(range(len(by_index))):
+        raise ValueError("exfil chunk sequence has gaps")
+    return BasePlan(hdr, records, [by_index[i] for i in range(len(by_index))])
+
+
+def team_chunks(plan: BasePlan, key: str) -> list[str]:
+    """Exfil chunks for `key`: the base message with its KEY line replaced, split like the base."""
+    message = plan.message()
+    lines = message.split("\n")
+    if not lines[0].startswith("KEY:"):
+        raise ValueError("base message does not start with a KEY line")
+    lines[0] = f"KEY:{key}"
+    b64 = base64.urlsafe_b64encode("\n".join(lines).encode("utf-8")).decode("ascii").rstrip("=")
+    size = len(plan.chunks[0])
+    chunks = [b64[i:i + size] for i in range(0, len(b64), size)]
+    if len(chunks) != len(plan.chunks):
+        raise ValueError(
+            f"key {key[:12]}... needs {len(chunks)} chunks, the base capture has {len(plan.chunks)}; regenerate instead"
+        )
+    return chunks
+
+
+def _l4_csum_offset(rp: RecordPlan) -> int:
+    return rp.l4 + (16 if rp.proto == 6 else 6)
+
+
+def _l4_checksum(fr: bytearray, rp: RecordPlan) -> int:
+    seg = memoryview(fr)[rp.l4:]
+    pseudo = bytes(fr[26:34]) + struct.pack("!BBH", 0, rp.proto, len(seg))
+    off = _l4_csum_offset(rp) - rp.l4
+    return internet_checksum(pseudo, seg[:off], b"\x00\x00", seg[off + 2:])
+
+
+class VariantWriter:
+    """Applies one team's chunks and maps to the planned records of a base capture."""
+
+    def __init__(self, plan: BasePlan, chunks: list[str], ip_map: dict[bytes, bytes], port_map: dict[tuple[bytes, int], int]):
+        self.plan = plan
+        self.chunks = [c.encode("ascii") for c in chunks]
+        self.ip_map = ip_map
+        self.port_map = port_map
+        self._ph = struct.Struct(plan.hdr.endian + "IIII")
+
+    def _patch(self, fr: bytearray, rp: RecordPlan, seq_delta: dict[tuple, int]) -> bytearray:
+        l4 = rp.l4
+        l4_csum_at = _l4_csum_offset(rp)
+        # UDP checksum 0 means "none" and stays 0.
+        l4_csum = struct.unpack_from("!H", fr, l4_csum_at)[0] if rp.proto in (6, 17) else 0
+        track_l4 = rp.proto == 6 or (rp.proto == 17 and l4_csum != 0)
+        ip_csum = struct.unpack_from("!H", fr, 24)[0]
+        old_l4 = new_l4 = old_addr = new_addr = 0
+        delta = 0
+
+        # Exfil chunks, last first so earlier offsets stay valid.
+        for off, length, index in sorted(rp.chunks, reverse=True):
+            new = self.chunks[index]
+            if len(new) == length:
+                pad = b"\x00" if (off - l4) % 2 else b""
+                old_l4 += ones_complement_sum(pad + fr[off:off + length])
+                new_l4 += ones_complement_sum(pad + new)
+                fr[off:off + length] = new
+                continue
+            d = len(new) - length
+            fr[off:off + length] = new
+            delta += d
+            if rp.dns is not None:
+                fr[off - 1] = len(new)  # label length byte
+                # Pointer fields behind the label moved; so did names they point to behind it.
+                label_end = off + length - rp.dns
+                for p in rp.pointers:
+                    if p > off:
+                        p += d
+                    target = struct.unpack_from("!H", fr, p)[0] & 0x3FFF
+                    if target >= label_end:
+                        struct.pack_into("!H", fr, p, 0xC000 | (target + d))
+
+        # TCP: shift seq by what earlier segments of this direction grew, ack by the reverse direction.
+        if rp.tcp_flow is not None:
+            src, dst, sport, dport = rp.tcp_flow
+            d_seq = seq_delta.get(rp.tcp_flow, 0)
+            d_ack = seq_delta.get((dst, src, dport, sport), 0)
+            if d_seq or d_ack:
+                seq, ack = struct.unpack_from("!II", fr, l4 + 4)
+                new_seq, new_ack = (seq + d_seq) & 0xFFFFFFFF, (ack + d_ack) & 0xFFFFFFFF
+                struct.pack_into("!II", fr, l4 + 4, new_seq, new_ack)
+                old_l4 += seq + ack
+                new_l4 += new_seq + new_ack
+            if delta:
+                seq_delta[rp.tcp_flow] = d_seq + delta
+
+        # Ports (keyed by the original endpoint), then addresses.
+        if rp.proto in (6, 17):
+            src, dst = bytes(fr[26:30]), bytes(fr[30:34])
+            sport, dport = struct.unpack_from("!HH", fr, l4)
+            new_sport = self.port_map.get((src, sport), sport)
+            new_dport = self.port_map.get((dst, dport), dport)
+            if (new_sport, new_dport) != (sport, dport):
+                struct.pack_into("!HH", fr, l4, new_sport, new_dport)
+                old_l4 += sport + dport
+                new_l4 += new_sport + new_dport
+        for at in (26, 30):
+            old = bytes(fr[at:at + 4])
+            new = self.ip_map.get(old)
+            if new is not None and new != old:
+                fr[at:at + 4] = new
+                old_addr += int.from_bytes(old, "big")
+                new_addr += int.from_bytes(new, "big")
+
+        old_ip, new_ip = old_addr, new_addr
+        if delta:
+            total_len = struct.unpack_from("!H", fr, 16)[0]
+            struct.pack_into("!H", fr, 16, total_len + delta)
+            old_ip += total_len
+            new_ip += total_len + delta
+            if rp.proto == 17:
+                struct.pack_into("!H", fr, l4 + 4, struct.unpack_from("!H", fr, l4 + 4)[0] + delta)
+        if old_ip != new_ip:
+            struct.pack_into("!H", fr, 24, checksum_update(ip_csum, old_ip, new_ip))
+
+        if track_l4:
+            if delta:
+                # The segment changed length: sum it again.
+                csum = _l4_checksum(fr, rp)
+            else:
+                # Pseudo-header addresses are part of the L4 checksum too.
+                csum = checksum_update(l4_csum, old_l4 + old_addr, new_l4 + new_addr)
+            if rp.proto == 17 and csum == 0:
+                csum = 0xFFFF
+            struct.pack_into("!H", fr, l4_csum_at, csum)
+        return fr
+
+    def write(self, mm, out) -> None:
+        out.write(mm[:PCAP_GH_LEN])
+        seq_delta: dict[tuple, int] = {}
+        pos = PCAP_GH_LEN
+        for rp in self.plan.records:
+            out.write(mm[pos:rp.pos])
+            ts_sec, ts_frac, incl, orig = self._ph.unpack_from(mm, rp.pos)
+            a = rp.pos + PCAP_PH_LEN
+            fr = self._patch(bytearray(mm[a:a + incl]), rp, seq_delta)
+            out.write(self._ph.pack(ts_sec, ts_frac, len(fr), orig + len(fr) - incl))
+            out.write(fr)
+            pos = a + incl
+        out.write(mm[pos:])
+
+
+def parse_ip_map(items) -> dict[bytes, bytes]:
+    out: dict[bytes, bytes] = {}
+    for old, new in items:
+        out[bytes(int(x) for x in old.split("."))] = bytes(int(x) for x in new.split("."))
+    return out
+
+
+def parse_port_map(items) -> dict[tuple[bytes, int], int]:
+    out: dict[tuple[bytes, int], int] = {}
+    for endpoint, port in items:
+        ip, _, old_port = endpoint.rpartition(":")
+        out[(bytes(int(x) for x in ip.split(".")), int(old_port))] = int(port)
+    return out
+
+
+def _pairs(values: list[str], what: str) -> list[tuple[str, str]]:
+    out = []
+    for v in values:
+        old, sep, new = v.partition("=")
+        if not sep:
+            raise SystemExit(f"--{what} expects OLD=NEW, got {v!r}")
+        out.append((old, new))
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Write per-team variants of a NET-01/NET-02 capture")
+    ap.add_argument("pcap", help="base capture written by the generator")
+    ap.add_argument("--challenge", choices=CHALLENGES, required=True)
+    ap.add_argument("-o", "--out", required=True, help="output pcap (--key) or directory (--teams)")
+    who = ap.add_mutually_exclusive_group(required=True)
+    who.add_argument("--key", help="single variant for this key")
+    who.add_argument("--teams", help="JSON list of {name, key, ip?, port?}")
+    ap.add_argument("--ip", action="append", default=[], help="OLD=NEW address remap (repeatable)")
+    ap.add_argument("--port", action="append", default=[], help="IP:OLD=NEW port remap of that endpoint (repeatable)")
+    args = ap.parse_args()
+
+    ip_map = parse_ip_map(_pairs(args.ip, "ip"))
+    port_map = parse_port_map(_pairs(args.port, "port"))
+    if args.teams:
+        with open(args.teams, "r", encoding="utf-8") as fh:
+            teams = json.load(fh)
+    else:
+        teams = [{"name": None, "key": args.key}]
+
+    variants = []
+    for t in teams:
+        t_ip = dict(ip_map)
+        t_ip.update(parse_ip_map(t.get("ip", {}).items()))
+        t_port = dict(port_map)
+        t_port.update(parse_port_map(t.get("port", {}).items()))
+        variants.append((t["name"], t["key"], t_ip, t_port))
+
+    addresses = {ip for _n, _k, m, _p in variants for ip in m}
+    addresses |= {ip for _n, _k, _m, p in variants for ip, _port in p}
+    started = time.perf_counter()
+    plan = build_plan(args.pcap, args.challenge, addresses)
+
+    if args.teams:
+        os.makedirs(args.out, exist_ok=True)
+    with open(args.pcap, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for name, key, t_ip, t_port in variants:
+            out_path = os.path.join(args.out, f"{name}.pcap") if args.teams else args.out
+            writer = VariantWriter(plan, team_chunks(plan, key), t_ip, t_port)
+            with open(out_path, "wb") as out:
+                writer.write(mm, out)
+    print(
+        f"[+] {len(variants)} variant(s) of {args.pcap}: {len(plan.records)} patched records each,"
+        f" {time.perf_counter() - started:.2f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
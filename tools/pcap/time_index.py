@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Sparse time index and [t0, t1) range extraction for a capture.
+
+The index keeps one entry per block of --stride records: the block's file
+offset, the timestamp of its first record and the min/max timestamp inside it.
+It is built lazily on the first query (one mmap pass) and persisted next to the
+capture as <capture>.tidx; a size/mtime mismatch rebuilds it.
+
+Time-ordered captures (NET-02) are answered by a binary search on the block
+start timestamps and a forward scan that stops at t1. Unordered captures
+(NET-01 frames are shuffled) only visit the blocks whose [min, max] overlaps
+the window. Either way the rest of the file is never touched.
+
+Records are copied verbatim (original global header, ns/us resolution kept).
+Pure python, no deps.
+
+Usage:
+  python3 tools/pcap/time_index.py capture.pcap --from 1700000012.0 --to 1700000012.2 -o window.pcap
+  python3 tools/pcap/time_index.py capture.pcap --from-us 1700000012000000 --to-us 1700000012200000 --count
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Callable, Iterator
+
+from pcapio import PCAP_GH_LEN, PCAP_PH_LEN, Pkt, iter_mmap_records, parse_global_header
+
+
+DEFAULT_STRIDE = 1024
+INDEX_SUFFIX = ".tidx"
+INDEX_MAGIC = b"PCAPTIDX"
+INDEX_VERSION = 1
+# magic, version, stride, sorted, capture size, capture mtime_ns, blocks
+INDEX_HEADER = struct.Struct("<8sIIIQQQ")
+INDEX_FIELDS = 4  # offset, first_ts, min_ts, max_ts (int64 each)
+
+
+class TimeIndex:
+    """
+    Lazily built sparse index over one capture. The mmap stays open until
+    close(); use it as a context manager.
+    """
+
+    def __init__(self, pcap_path: str, stride: int = DEFAULT_STRIDE, index_path: str | None = None):
+        if stride < 1:
+            raise ValueError("stride must be >= 1")
+        self.pcap_path = pcap_path
+        self.index_path = index_path or pcap_path + INDEX_SUFFIX
+        self.stride = stride
+        self._f = open(pcap_path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.hdr = parse_global_header(self._mm[:PCAP_GH_LEN])
+        self._entries: array | None = None
+        self._firsts: list[int] = []
+        self.sorted = False
+
+    def close(self) -> None:
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self) -> TimeIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def blocks(self) -> int:
+        self._ensure()
+        return len(self._entries) // INDEX_FIELDS
+
+    # --- building / persistence -------------------------------------------
+
+    def _stamp(self) -> tuple[int, int]:
+        st = os.stat(self.pcap_path)
+        return st.st_size, st.st_mtime_ns
+
+    def _load(self) -> bool:
+        try:
+            with open(self.index_path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            return False
+        if len(raw) < INDEX_HEADER.size:
+            return False
+        magic, version, stride, is_sorted, size, mtime_ns, n = INDEX_HEADER.unpack_from(raw)
+        if (magic, version, stride) != (INDEX_MAGIC, INDEX_VERSION, self.stride):
+            return False
+        if (size, mtime_ns) != self._stamp():
+            return False
+        entries = array("q")
+        entries.frombytes(raw[INDEX_HEADER.size:])
+        if len(entries) != n * INDEX_FIELDS:
+            return False
+        self._entries, self.sorted = entries, bool(is_sorted)
+        return True
+
+    def _build(self) -> None:
+        entries = array("q")
+        stride = self.stride
+        is_sorted = True
+        prev = None
+        lo = hi = 0
+        for i, (ts, a, _incl) in enumerate(iter_mmap_records(self._mm, self.hdr)):
+            if i % stride == 0:
+                if i:
+                    entries[-2:] = array("q", (lo, hi))
+                entries.extend((a - PCAP_PH_LEN, ts, ts, ts))
+                lo = hi = ts
+            elif ts < lo:
+                lo = ts
+            elif ts > hi:
+                hi = ts
+            if prev is not None and ts < prev:
+                is_sorted = False
+            prev = ts
+        if entries:
+            entries[-2:] = array("q", (lo, hi))
+        self._entries, self.sorted = entries, is_sorted
+
+    def _save(self) -> None:
+        size, mtime_ns = self._stamp()
+        head = INDEX_HEADER.pack(
+            INDEX_MAGIC, INDEX_VERSION, self.stride, int(self.sorted), size, mtime_ns, len(self._entries) // INDEX_FIELDS
+        )
+        tmp = f"{self.index_path}.tmp{os.getpid()}"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(head)
+                self._entries.tofile(f)
+            os.replace(tmp, self.index_path)
+        except OSError as e:
+            # Read-only capture directory: keep the in-memory index.
+            print(f"[!] could not persist index {self.index_path}: {e}", file=sys.stderr)
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def _ensure(self) -> None:
+        if self._entries is not None:
+            return
+        if not self._load():
+            self._build()
+            self._save()
+        self._firsts = self._entries[1::INDEX_FIELDS].tolist()
+
+    # --- queries ------------------------------------------------------------
+
+    def iter_range(self, t0_us: int, t1_us: int) -> Iterator[tuple[int, int, int]]:
+        """(ts_us, data_offset, caplen) of the records with t0 <= ts < t1, in file order."""
+        self._ensure()
+        if t1_us <= t0_us or not self._firsts:
+            return
+        mm, e = self._mm, self._entries
+        if self.sorted:
+            # bisect_left: records equal to t0 may end the previous block
+            b = max(bisect_left(self._firsts, t0_us) - 1, 0)
+            for rec in iter_mmap_records(mm, self.hdr, e[b * INDEX_FIELDS]):
+                if rec[0] >= t1_us:
+                    return
+                if rec[0] >= t0_us:
+                    yield rec
+            return
+        stride = self.stride
+        for b in range(len(self._firsts)):
+            lo, hi = e[b * INDEX_FIELDS + 2], e[b * INDEX_FIELDS + 3]
+            if hi < t0_us or lo >= t1_us:
+                continue
+            for i, rec in enumerate(iter_mmap_records(mm, self.hdr, e[b * INDEX_FIELDS])):
+                if i == stride:
+                    break
+                if t0_us <= rec[0] < t1_us:
+                    yield rec
+
+    def for_each(self, t0_us: int, t1_us: int, callback: Callable[[Pkt], None]) -> int:
+        """Call callback(Pkt) for every record in [t0, t1); returns the count."""
+        n = 0
+        for ts, a, incl in self.iter_range(t0_us, t1_us):
+            callback(Pkt(ts, self._mm[a:a + incl]))
+            n += 1
+        return n
+
+    def extract(self, t0_us: int, t1_us: int, out_path: str) -> int:
+        """Write the records in [t0, t1) to a new pcap; returns the count."""
+        n = 0
+        mm = self._mm
+        with open(out_path, "wb") as out:
+            out.write(self.hdr.raw)
+            for _ts, a, incl in self.iter_range(t0_us, t1_us):
+                out.write(mm[a - PCAP_PH_LEN:a + incl])
+                n += 1
+        return n
+
+
+def _us(seconds: float | None, micros: int | None, what: str) -> int:
+    if micros is not None:
+        return micros
+    if seconds is not None:
+        return round(seconds * 1_000_000)
+    raise SystemExit(f"missing --{what} or --{what}-us")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Extract the packets of a time window via a sparse time index")
+    ap.add_argument("pcap", help="input capture")
+    ap.add_argument("--from", dest="t0", type=float, help="window start, epoch seconds")
+    ap.add_argument("--to", dest="t1", type=float, help="window end (exclusive), epoch seconds")
+    ap.add_argument("--from-us", dest="t0_us", type=int, help="window start, epoch microseconds")
+    ap.add_argument("--to-us", dest="t1_us", type=int, help="window end (exclusive), epoch microseconds")
+    ap.add_argument("--stride", type=int, default=DEFAULT_STRIDE, help="records per index entry")
+    ap.add_argument("-o", "--out", help="write the window to this pcap")
+    ap.add_argument("--count", action="store_true", help="only print the number of packets in the window")
+    args = ap.parse_args()
+
+    t0, t1 = _us(args.t0, args.t0_us, "from"), _us(args.t1, args.t1_us, "to")
+    if not args.out and not args.count:
+        ap.error("need -o OUT or --count")
+    with TimeIndex(args.pcap, args.stride) as idx:
+        if args.out:
+            n = idx.extract(t0, t1, args.out)
+            print(f"[+] {n} packets -> {args.out}", file=sys.stderr)
+        else:
+            n = sum(1 for _ in idx.iter_range(t0, t1))
+        if args.count:
+            print(n)
+        kind = "time-ordered" if idx.sorted else "unordered"
+        print(f"[+] index: {idx.blocks} blocks of {idx.stride} ({kind})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())